@@ -0,0 +1,314 @@
+"""End-to-end benchmarks for the four dashboard endpoints.
+
+    python -m benchmarks.bench_endpoints run [--url http://host:8000] [--sizes 100 1000 4000]
+    python -m benchmarks.bench_endpoints compare BASE.json NEW.json [--threshold 0.1]
+
+Without --url the app is driven in-process through FastAPI's TestClient
+(set SMART_FARM_HTTP_MODE=replay to keep upstream services out of it).
+"""
+import argparse
+import datetime
+import functools
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks import synthetic
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+# Inline JSON rasters above this side length are impractically large
+MAX_JSON_SIZE = 1000
+
+
+# -----------------------------
+# Memory sampling
+# -----------------------------
+class RSSSampler:
+    def __init__(self, pid=None, interval=0.005):
+        self.path = f"/proc/{pid or 'self'}/statm"
+        self.interval = interval
+        self.baseline = 0
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _rss(self):
+        try:
+            with open(self.path) as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError):
+            # No procfs: fall back to this process's lifetime peak
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self._rss())
+            time.sleep(self.interval)
+
+    # Growth over the RSS at entry, so whatever the harness already holds
+    # (payloads, earlier cases) is not charged to the case being measured
+    @property
+    def growth(self):
+        return max(self.peak - self.baseline, 0)
+
+    def __enter__(self):
+        self.baseline = self.peak = self._rss()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+# -----------------------------
+# Cases
+# -----------------------------
+# Each case is a name plus a factory; calling the factory encodes that
+# case's payload and returns a function giving request kwargs for iteration
+# i. Payloads are built just before their case runs and dropped after it,
+# and encoded once so client-side serialization is not part of the timing;
+# i only nudges a bbox edge / day so response caches and memoization stay
+# cold.
+def _npy(array):
+    buf = io.BytesIO()
+    np.save(buf, array, allow_pickle=False)
+    return buf.getvalue()
+
+
+def _json_body(payload, i):
+    body = dict(payload, max_lat=payload["max_lat"] + i * 1e-9)
+    return {"content": json.dumps(body).encode("utf-8"), "headers": {"Content-Type": "application/json"}}
+
+
+def _raster_case(endpoint, make_arrays, size, days, encoding):
+    arrays, scalars = make_arrays(size, days)
+    if encoding == "npy":
+        files = {k: (f"{k}.npy", _npy(v), "application/octet-stream") for k, v in arrays.items()}
+        return lambda i: {
+            "url": f"{endpoint}/npy",
+            "files": files,
+            "data": {k: str(v) for k, v in dict(scalars, max_lat=scalars["max_lat"] + i * 1e-9).items()},
+        }
+
+    payload = dict({k: v.tolist() for k, v in arrays.items()}, **scalars)
+    return lambda i: {"url": endpoint, **_json_body(payload, i)}
+
+
+def _pest_case(size, days):
+    payload = synthetic.pest_request(size, days)
+    return lambda i: {"url": "/button2_pests", **_json_body(payload, i)}
+
+
+def build_cases(endpoints, sizes, days_list, encoding):
+    cases = []
+    if "weather" in endpoints:
+        cases.append(("weather", lambda: lambda i: {"url": "/button1_weather", "json": synthetic.weather_request(i)}))
+
+    for size in sizes:
+        enc = encoding if encoding != "auto" else ("json" if size <= MAX_JSON_SIZE else "npy")
+        for days in days_list:
+            if "pests" in endpoints:
+                if size > MAX_JSON_SIZE:
+                    print(f"skip pests size={size}: JSON-only endpoint", file=sys.stderr)
+                else:
+                    cases.append((f"pests/size={size}/days={days}",
+                                  functools.partial(_pest_case, size, days)))
+            if "irrigation" in endpoints:
+                cases.append((f"irrigation/size={size}/days={days}/{enc}", functools.partial(
+                    _raster_case, "/button3_irrigation", synthetic.irrigation_arrays, size, days, enc)))
+            if "fertilizer" in endpoints:
+                cases.append((f"fertilizer/size={size}/days={days}/{enc}", functools.partial(
+                    _raster_case, "/button4_fertilizer", synthetic.fertilizer_arrays, size, days, enc)))
+    return cases
+
+
+# -----------------------------
+# Runner
+# -----------------------------
+def run_case(client, make_request, repeat, warmup, concurrency, server_pid=None):
+    for i in range(warmup):
+        client.post(**make_request(-1 - i))
+
+    # Failed requests are counted but kept out of the timings, so an
+    # endpoint that errors out quickly never reads as a speed-up
+    latencies = [None] * repeat
+    sizes = [None] * repeat
+    statuses = {}
+    lock = threading.Lock()
+
+    def one(i):
+        kwargs = make_request(i)
+        start = time.perf_counter()
+        response = client.post(**kwargs)
+        elapsed = time.perf_counter() - start
+        if 200 <= response.status_code < 300:
+            latencies[i] = elapsed
+            sizes[i] = len(response.content)
+        with lock:
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    with RSSSampler(server_pid) as rss:
+        wall = time.perf_counter()
+        if concurrency > 1:
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                list(pool.map(one, range(repeat)))
+        else:
+            for i in range(repeat):
+                one(i)
+        wall = time.perf_counter() - wall
+
+    ms = np.array([t for t in latencies if t is not None]) * 1000.0
+    ok = len(ms)
+    return {
+        "p50_ms": float(np.percentile(ms, 50)) if ok else None,
+        "p99_ms": float(np.percentile(ms, 99)) if ok else None,
+        "mean_ms": float(ms.mean()) if ok else None,
+        "throughput_rps": ok / wall if wall > 0 else 0.0,
+        "rss_growth_mb": rss.growth / 1024 ** 2,
+        "response_bytes": int(np.median([s for s in sizes if s is not None])) if ok else None,
+        "errors": repeat - ok,
+        "status": {str(k): v for k, v in statuses.items()},
+    }
+
+
+def _fmt(value, spec, width):
+    return format(value, spec) if value is not None else "-".rjust(width)
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run(args):
+    cases = build_cases(args.endpoints, args.sizes, args.days, args.encoding)
+
+    if args.url:
+        import httpx
+        client = httpx.Client(base_url=args.url, timeout=None)
+    else:
+        from fastapi.testclient import TestClient
+        import main
+        client = TestClient(main.app)
+
+    results = []
+    with client:
+        for name, build in cases:
+            make_request = build()
+            stats = run_case(client, make_request, args.repeat, args.warmup, args.concurrency, args.server_pid)
+            del make_request  # release this case's payload before building the next
+            results.append({"case": name, **stats})
+            print(f"{name:45s} p50 {_fmt(stats['p50_ms'], '9.1f', 9)} ms  p99 {_fmt(stats['p99_ms'], '9.1f', 9)} ms  "
+                  f"{stats['throughput_rps']:7.2f} rps  rss {stats['rss_growth_mb']:+8.1f} MB  "
+                  f"{_fmt(stats['response_bytes'], '>10d', 10)} B  {stats['status']}")
+            if stats["errors"]:
+                print(f"{'':45s} {stats['errors']}/{args.repeat} requests failed", file=sys.stderr)
+
+    commit = _git_commit()
+    report = {
+        "commit": commit,
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "host": platform.node(),
+        "python": platform.python_version(),
+        "target": args.url or "in-process",
+        "params": {"repeat": args.repeat, "warmup": args.warmup, "concurrency": args.concurrency},
+        "results": results,
+    }
+    out = Path(args.out) if args.out else RESULTS_DIR / f"{commit}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2))
+    print(f"Results written to {out}")
+
+
+# -----------------------------
+# Comparison
+# -----------------------------
+# Metric -> True when higher is worse
+METRICS = {
+    "p50_ms": True,
+    "p99_ms": True,
+    "throughput_rps": False,
+    "rss_growth_mb": True,
+    "response_bytes": True,
+}
+
+
+def compare(args):
+    base = json.loads(Path(args.base).read_text())
+    new = json.loads(Path(args.new).read_text())
+    base_cases = {r["case"]: r for r in base["results"]}
+
+    print(f"{base.get('commit', '?')} -> {new.get('commit', '?')} (threshold {args.threshold:.0%})")
+    regressions = 0
+    for result in new["results"]:
+        old = base_cases.get(result["case"])
+        if old is None:
+            print(f"{result['case']:45s} (new case)")
+            continue
+        # Any failed request is a regression in its own right
+        errors_before, errors_after = old.get("errors", 0), result.get("errors", 0)
+        if errors_after > errors_before:
+            print(f"{result['case']:45s} {'errors':15s} {errors_before:12d} -> {errors_after:12d} "
+                  f"{result['status']} REGRESSION")
+            regressions += 1
+        for metric, higher_is_worse in METRICS.items():
+            before, after = old.get(metric), result.get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            worse = change > args.threshold if higher_is_worse else change < -args.threshold
+            if worse or args.verbose:
+                flag = "REGRESSION" if worse else ""
+                print(f"{result['case']:45s} {metric:15s} {before:12.2f} -> {after:12.2f} "
+                      f"({change:+.1%}) {flag}")
+            regressions += worse
+
+    print(f"{regressions} regression(s)")
+    return 1 if regressions else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_run = sub.add_parser("run", help="run the benchmark suite")
+    p_run.add_argument("--url", help="benchmark a running server instead of in-process")
+    p_run.add_argument("--server-pid", type=int, help="sample RSS of this PID (with --url)")
+    p_run.add_argument("--endpoints", nargs="+", default=["weather", "pests", "irrigation", "fertilizer"])
+    p_run.add_argument("--sizes", nargs="+", type=int, default=[100, 1000, 4000])
+    p_run.add_argument("--days", nargs="+", type=int, default=[30, 150])
+    p_run.add_argument("--encoding", choices=["auto", "json", "npy"], default="auto")
+    p_run.add_argument("--repeat", type=int, default=20)
+    p_run.add_argument("--warmup", type=int, default=2)
+    p_run.add_argument("--concurrency", type=int, default=1)
+    p_run.add_argument("--out", help="results file (default benchmarks/results/<commit>.json)")
+
+    p_cmp = sub.add_parser("compare", help="flag regressions between two result files")
+    p_cmp.add_argument("base")
+    p_cmp.add_argument("new")
+    p_cmp.add_argument("--threshold", type=float, default=0.10)
+    p_cmp.add_argument("--verbose", action="store_true")
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        run(args)
+        return 0
+    return compare(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
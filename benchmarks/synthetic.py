@@ -0,0 +1,67 @@
+import numpy as np
+
+
+# -----------------------------
+# Synthetic inputs
+# -----------------------------
+# Smooth fields plus noise look enough like real NDVI/NDWI/NDRE/soil
+# moisture rasters to exercise the pipelines, and are reproducible by seed.
+def field(size, lo, hi, seed=0):
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[0:size, 0:size].astype(np.float32) / max(size, 1)
+    base = 0.5 + 0.25 * np.sin(6.0 * xx + rng.uniform(0, 6)) * np.cos(4.0 * yy + rng.uniform(0, 6))
+    base += rng.normal(0.0, 0.05, (size, size)).astype(np.float32)
+    return (lo + (hi - lo) * np.clip(base, 0.0, 1.0)).astype(np.float32)
+
+
+def season(days, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(days, dtype=np.float32)
+    et0 = 3.5 + 1.5 * np.sin(2 * np.pi * t / 365.0) + rng.normal(0, 0.4, days)
+    rain = np.where(rng.random(days) < 0.15, rng.gamma(2.0, 4.0, days), 0.0)
+    temperature = 18 + 8 * np.sin(2 * np.pi * t / 365.0) + rng.normal(0, 2, days)
+    humidity = np.clip(60 + 15 * np.sin(2 * np.pi * t / 30.0) + rng.normal(0, 5, days), 10, 100)
+    return {
+        "daily_ET0": np.clip(et0, 0, None).astype(np.float32),
+        "daily_rain": rain.astype(np.float32),
+        "temperature": temperature.astype(np.float32),
+        "humidity": humidity.astype(np.float32),
+    }
+
+
+BBOX = {"min_lat": 30.00, "min_lon": 31.00, "max_lat": 30.05, "max_lon": 31.05}
+
+
+def weather_request(seed=0):
+    # Different days_since_sowing per call keeps the response cache cold
+    return {"bbox": [BBOX["min_lon"], BBOX["min_lat"], BBOX["max_lon"], BBOX["max_lat"]],
+            "days_since_sowing": 10 + seed}
+
+
+def pest_request(size, days, seed=0):
+    s = season(days, seed)
+    return {
+        "weather_data": {k: s[k].tolist() for k in ("temperature", "humidity", "daily_rain")},
+        "indices_data": {"ndvi": field(size, 0.1, 0.9, seed).tolist(),
+                         "ndwi": field(size, -0.3, 0.5, seed + 1).tolist()},
+        "crop_stage": 3,
+        **BBOX,
+    }
+
+
+def irrigation_arrays(size, days, seed=0):
+    s = season(days, seed)
+    return {
+        "ndvi": field(size, 0.1, 0.9, seed),
+        "ndwi": field(size, -0.3, 0.5, seed + 1),
+        "daily_ET0": s["daily_ET0"],
+        "daily_rain": s["daily_rain"],
+    }, {"days_after_sowing": days, **BBOX}
+
+
+def fertilizer_arrays(size, days, seed=0):
+    return {
+        "ndvi": field(size, 0.1, 0.9, seed),
+        "ndre": field(size, 0.05, 0.6, seed + 2),
+        "sm": field(size, 0.05, 0.45, seed + 3),
+    }, {"das": days, **BBOX}
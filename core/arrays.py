@@ -0,0 +1,114 @@
+import io
+from typing import Annotated
+
+import numpy as np
+from numpy.lib import format as npy_format
+from pydantic import PlainSerializer, PlainValidator, WithJsonSchema
+
+from core.raster_store import raster_store
+
+
+# -----------------------------
+# Binary array decoding
+# -----------------------------
+# Parses the .npy header and wraps the payload with np.frombuffer, so the
+# raster is never copied or walked element by element. Pass a bytearray
+# to get a writable array.
+def decode_npy(data):
+    stream = io.BytesIO(data)
+    version = npy_format.read_magic(stream)
+    if version == (1, 0):
+        shape, fortran_order, dtype = npy_format.read_array_header_1_0(stream)
+    elif version in ((2, 0), (3, 0)):
+        shape, fortran_order, dtype = npy_format.read_array_header_2_0(stream)
+    else:
+        raise ValueError(f"Unsupported .npy version {version}")
+
+    if dtype.hasobject:
+        raise ValueError("Object arrays are not accepted")
+
+    count = int(np.prod(shape, dtype=np.int64))
+    offset = stream.tell()
+    if len(data) - offset < count * dtype.itemsize:
+        raise ValueError("Truncated .npy payload")
+
+    array = np.frombuffer(data, dtype=dtype, count=count, offset=offset)
+    return array.reshape(shape, order="F" if fortran_order else "C")
+
+
+def encode_npy(array):
+    buf = io.BytesIO()
+    np.save(buf, np.asarray(array), allow_pickle=False)
+    return buf.getvalue()
+
+
+def read_upload(upload):
+    # Read straight into one preallocated buffer (no intermediate bytes copy)
+    f = upload.file
+    f.seek(0, io.SEEK_END)
+    size = f.tell()
+    f.seek(0)
+    buf = bytearray(size)
+    view = memoryview(buf)
+    pos = 0
+    while pos < size:
+        n = f.readinto(view[pos:])
+        if not n:
+            break
+        pos += n
+    return buf
+
+
+# -----------------------------
+# Pydantic array fields
+# -----------------------------
+# np.asarray infers the dtype in one C-level pass; ragged rows, strings,
+# booleans and nulls (object dtype) raise here and surface as a 422 instead
+# of being coerced. JSON has no no-data value: NaN no-data cells must come
+# in through .npy uploads or the raster store. A string is taken as the ID
+# of a raster previously uploaded to the raster store.
+def as_array(value, ndim=None, dtype=np.float32):
+    if isinstance(value, str):
+        try:
+            value = raster_store.get(value)
+        except KeyError:
+            raise ValueError(f"unknown raster id {value!r}")
+    try:
+        array = np.asarray(value)
+    except (TypeError, ValueError) as exc:
+        raise ValueError(f"expected a numeric array ({exc})")
+    if array.dtype.kind not in "iuf":
+        raise ValueError(f"expected a numeric array, got {array.dtype} values")
+    array = array.astype(dtype, copy=False)
+    if ndim is not None and array.ndim != ndim:
+        raise ValueError(f"expected a {ndim}-D array, got shape {array.shape}")
+    return array
+
+
+def NDArray(ndim=None, dtype=np.float32):
+    schema = {"type": "number"}
+    for _ in range(ndim or 1):
+        schema = {"type": "array", "items": schema}
+    schema = {"anyOf": [schema, {"type": "string", "description": "raster store ID"}]}
+
+    return Annotated[
+        np.ndarray,
+        PlainValidator(lambda value: as_array(value, ndim, dtype)),
+        PlainSerializer(lambda array: array.tolist(), return_type=list),
+        WithJsonSchema(schema),
+    ]
+
+
+Raster = NDArray(ndim=2)
+Series = NDArray(ndim=1)
+
+
+def same_shape(**arrays):
+    shapes = {name: array.shape for name, array in arrays.items()}
+    if len(set(shapes.values())) > 1:
+        raise ValueError(f"rasters must share one shape, got {shapes}")
+
+
+def check_same_shape(model, *fields):
+    same_shape(**{name: getattr(model, name) for name in fields})
+    return model
@@ -0,0 +1,121 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+
+import numpy as np
+
+from core import config
+
+_STOP = object()
+
+
+# -----------------------------
+# Micro-batching scheduler
+# -----------------------------
+# Requests run on FastAPI's threadpool, so callers block on a Future while a
+# single worker thread gathers whatever arrives within the batching window
+# (or until max_batch_size samples are queued) and runs one batched predict.
+# Once stopped, nothing new is accepted and anything still queued fails.
+class MicroBatcher:
+    def __init__(self, predict_fn, max_batch_size=32, max_wait_ms=5.0, timeout=config.WEATHER_BATCH_TIMEOUT):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.timeout = timeout
+        self._queue = queue.Queue()
+        self._thread = None
+        self._closed = True
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        with self._lock:
+            if not self.running:
+                self._closed = False
+                self._thread = threading.Thread(target=self._run, name="weather-batcher", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self):
+        # Closing under the lock guarantees _STOP is the last item enqueued
+        with self._lock:
+            self._closed = True
+            thread, self._thread = self._thread, None
+            if thread is not None and thread.is_alive():
+                self._queue.put(_STOP)
+        if thread is not None:
+            thread.join()
+        self._drain()
+
+    def submit(self, sequences, timeout=None):
+        sequences = np.asarray(sequences, dtype=np.float32)
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("MicroBatcher is stopped")
+            self._queue.put((sequences, future))
+        try:
+            return future.result(timeout=self.timeout if timeout is None else timeout)
+        except TimeoutError:
+            future.cancel()  # no-op if its batch is already running
+            raise
+
+    def _drain(self):
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not _STOP and item[1].set_running_or_notify_cancel():
+                item[1].set_exception(RuntimeError("MicroBatcher stopped before the request ran"))
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+
+            batch = [item]
+            size = len(item[0])
+            deadline = time.monotonic() + self.max_wait
+            while size < self.max_batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+                size += len(item[0])
+
+            self._flush(batch)
+
+    def _flush(self, batch):
+        # Group by per-sample shape so mismatched callers never share a tensor
+        groups = {}
+        for sequences, future in batch:
+            # Skips callers that timed out and cancelled while queued
+            if future.set_running_or_notify_cancel():
+                groups.setdefault(sequences.shape[1:], []).append((sequences, future))
+
+        for items in groups.values():
+            try:
+                outputs = self.predict_fn(np.concatenate([s for s, _ in items]))
+            except Exception as exc:
+                for _, future in items:
+                    future.set_exception(exc)
+                continue
+
+            offset = 0
+            for sequences, future in items:
+                future.set_result(outputs[offset:offset + len(sequences)])
+                offset += len(sequences)
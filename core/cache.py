@@ -0,0 +1,72 @@
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+# -----------------------------
+# LRU + TTL cache
+# -----------------------------
+# Bounded by entry count and, with maxbytes, by the total len() of the
+# values (for bytes payloads); the newest entry is always kept.
+class TTLCache:
+    def __init__(self, maxsize=256, ttl=300.0, maxbytes=None):
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.ttl = ttl
+        self.nbytes = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING or entry[0] <= now:
+                if entry is not _MISSING:
+                    self._pop(key)
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        expires = time.monotonic() + self.ttl
+        size = len(value) if self.maxbytes is not None else 0
+        with self._lock:
+            if key in self._data:
+                self._pop(key)
+            self._data[key] = (expires, value, size)
+            self.nbytes += size
+            while len(self._data) > self.maxsize or (
+                self.maxbytes is not None and self.nbytes > self.maxbytes and len(self._data) > 1
+            ):
+                self._pop(next(iter(self._data)))
+
+    def _pop(self, key):
+        self.nbytes -= self._data.pop(key)[2]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.nbytes = 0
+
+    def stats(self):
+        return {"size": len(self._data), "maxsize": self.maxsize, "bytes": self.nbytes,
+                "hits": self.hits, "misses": self.misses}
+
+
+# -----------------------------
+# Request fingerprints
+# -----------------------------
+# Nearby clicks on the same field land on the same key once the bbox is
+# rounded (4 decimals ~ 11 m at the equator)
+def weather_fingerprint(bbox, days_since_sowing, precision=4):
+    return ("weather", tuple(round(float(c), precision) for c in bbox), int(days_since_sowing))
@@ -0,0 +1,53 @@
+from functools import lru_cache
+
+import numpy as np
+
+
+# -----------------------------
+# Colour lookup tables
+# -----------------------------
+# Each legend is sampled once into an (n + 1, 4) uint8 RGBA table whose last
+# row is transparent no-data. Colouring a raster is then one affine scale
+# to an index plus a single fancy-index gather.
+class ColorLUT:
+    def __init__(self, table, vmin=0.0, vmax=1.0):
+        self.n = len(table)
+        self.table = np.vstack([np.asarray(table, dtype=np.uint8), np.zeros((1, 4), dtype=np.uint8)])
+        # Same table viewed as one uint32 per colour: gathers 4 bytes at once
+        self._packed = self.table.view(np.uint32).ravel()
+        self.vmin = float(vmin)
+        self.vmax = float(vmax)
+
+    @classmethod
+    def from_matplotlib(cls, name, vmin=0.0, vmax=1.0, n=256):
+        from matplotlib import colormaps
+        return cls(colormaps[name](np.linspace(0.0, 1.0, n), bytes=True), vmin, vmax)
+
+    @classmethod
+    def from_branca(cls, colormap, n=256):
+        # branca.colormap.LinearColormap, as used for the folium legends
+        values = np.linspace(colormap.vmin, colormap.vmax, n)
+        table = [colormap.rgba_bytes_tuple(v) for v in values]
+        return cls(table, colormap.vmin, colormap.vmax)
+
+    def indices(self, grid):
+        grid = np.asarray(grid, dtype=np.float32)
+        span = self.vmax - self.vmin
+        scale = (self.n - 1) / span if span > 0 else 0.0
+
+        x = grid * np.float32(scale)
+        x += np.float32(0.5 - self.vmin * scale)
+        np.clip(x, 0, self.n - 1, out=x)
+        x[~np.isfinite(grid)] = self.n
+        return x.astype(np.int32)
+
+    def apply(self, grid):
+        packed = np.take(self._packed, self.indices(grid))
+        return packed.view(np.uint8).reshape(packed.shape + (4,))
+
+    __call__ = apply
+
+
+@lru_cache(maxsize=64)
+def get_lut(name, vmin=0.0, vmax=1.0, n=256):
+    return ColorLUT.from_matplotlib(name, vmin, vmax, n)
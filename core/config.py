@@ -0,0 +1,129 @@
+import os
+from pathlib import Path
+
+# -----------------------------
+# Paths
+# -----------------------------
+BASE_DIR = Path(__file__).resolve().parent.parent
+MODEL_DIR = Path(os.getenv("SMART_FARM_MODEL_DIR", BASE_DIR / "models"))
+
+WEATHER_MODEL_PATH = MODEL_DIR / "weather_lstm_model.h5"
+WEATHER_SCALER_PATH = MODEL_DIR / "weather_scaler.pkl"
+
+# -----------------------------
+# Weather model
+# -----------------------------
+# Skip the dummy forward pass at startup (useful for scripts and CI)
+WEATHER_WARMUP = os.getenv("SMART_FARM_WEATHER_WARMUP", "1") == "1"
+
+# Micro-batching of concurrent LSTM forward passes
+WEATHER_BATCHING = os.getenv("SMART_FARM_WEATHER_BATCHING", "1") == "1"
+WEATHER_BATCH_MAX_SIZE = int(os.getenv("SMART_FARM_WEATHER_BATCH_MAX_SIZE", "32"))
+WEATHER_BATCH_WINDOW_MS = float(os.getenv("SMART_FARM_WEATHER_BATCH_WINDOW_MS", "5"))
+# Longest a caller waits on a batched prediction before giving up
+WEATHER_BATCH_TIMEOUT = float(os.getenv("SMART_FARM_WEATHER_BATCH_TIMEOUT", "30"))
+
+# Inference backend for the weather LSTM: "keras" or "numpy".
+# The NumPy backend reads the exported .npz if present, else the h5 weights.
+WEATHER_BACKEND = os.getenv("SMART_FARM_WEATHER_BACKEND", "keras").lower()
+WEATHER_NUMPY_WEIGHTS_PATH = Path(os.getenv(
+    "SMART_FARM_WEATHER_NUMPY_WEIGHTS", MODEL_DIR / "weather_lstm_weights.npz"
+))
+
+# Cells per LSTM forward pass when forecasting a whole raster
+WEATHER_GRID_CHUNK_CELLS = int(os.getenv("SMART_FARM_WEATHER_GRID_CHUNK_CELLS", "2048"))
+
+# -----------------------------
+# Response caching
+# -----------------------------
+WEATHER_CACHE_SIZE = int(os.getenv("SMART_FARM_WEATHER_CACHE_SIZE", "256"))
+WEATHER_CACHE_TTL = float(os.getenv("SMART_FARM_WEATHER_CACHE_TTL", "900"))
+# Decimal places kept from bbox coordinates when building cache keys
+WEATHER_CACHE_BBOX_PRECISION = int(os.getenv("SMART_FARM_WEATHER_CACHE_BBOX_PRECISION", "4"))
+
+# Browser cache lifetime for /weather/plot/{key}.png (content-addressed)
+WEATHER_PLOT_MAX_AGE = int(os.getenv("SMART_FARM_WEATHER_PLOT_MAX_AGE", "86400"))
+
+# -----------------------------
+# Rendering
+# -----------------------------
+# Max figures rasterized at the same time
+RENDER_CONCURRENCY = int(os.getenv("SMART_FARM_RENDER_CONCURRENCY", str(os.cpu_count() or 4)))
+
+# Overlay PNGs / specs for the shared Leaflet page
+OVERLAY_STORE_SIZE = int(os.getenv("SMART_FARM_OVERLAY_STORE_SIZE", "512"))
+# Overlay PNGs of large grids run to megabytes; cap the store's total too
+OVERLAY_STORE_MAX_BYTES = int(os.getenv("SMART_FARM_OVERLAY_STORE_MAX_BYTES", str(256 * 1024 ** 2)))
+OVERLAY_TTL = float(os.getenv("SMART_FARM_OVERLAY_TTL", "3600"))
+OVERLAY_MAX_AGE = int(os.getenv("SMART_FARM_OVERLAY_MAX_AGE", "86400"))
+
+# -----------------------------
+# Raster store
+# -----------------------------
+RASTER_STORE_DIR = Path(os.getenv("SMART_FARM_RASTER_STORE_DIR", BASE_DIR / "raster_store"))
+# Least recently used rasters (uploads and zone labels) are evicted past this
+RASTER_STORE_MAX_BYTES = int(os.getenv("SMART_FARM_RASTER_STORE_MAX_BYTES", str(2 * 1024 ** 3)))
+
+# -----------------------------
+# Pipeline memoization
+# -----------------------------
+IRRIGATION_MEMO_SIZE = int(os.getenv("SMART_FARM_IRRIGATION_MEMO_SIZE", "128"))
+# Optional on-disk tier; unset keeps results in memory only
+IRRIGATION_MEMO_DIR = os.getenv("SMART_FARM_IRRIGATION_MEMO_DIR") or None
+IRRIGATION_MEMO_DISK_ENTRIES = int(os.getenv("SMART_FARM_IRRIGATION_MEMO_DISK_ENTRIES", "1024"))
+
+# -----------------------------
+# Water balance
+# -----------------------------
+# Persisted end-of-day root-zone depletion per field
+WATER_BALANCE_DIR = Path(os.getenv("SMART_FARM_WATER_BALANCE_DIR", BASE_DIR / "water_balance"))
+
+# -----------------------------
+# Tiled execution
+# -----------------------------
+TILE_SIZE = int(os.getenv("SMART_FARM_TILE_SIZE", "512"))
+
+# Opt-in multi-core tile execution: "process" (shared memory) or "thread"
+PARALLEL_WORKERS = int(os.getenv("SMART_FARM_PARALLEL_WORKERS", str(os.cpu_count() or 4)))
+PARALLEL_BACKEND = os.getenv("SMART_FARM_PARALLEL_BACKEND", "process")
+# Never "fork": the server process is multithreaded (uvicorn, TensorFlow)
+PARALLEL_START_METHOD = os.getenv("SMART_FARM_PARALLEL_START_METHOD", "forkserver")
+
+# -----------------------------
+# Management zones
+# -----------------------------
+ZONE_CLASSES = int(os.getenv("SMART_FARM_ZONE_CLASSES", "4"))
+# Zones smaller than this are merged into their surroundings
+ZONE_MIN_PIXELS = int(os.getenv("SMART_FARM_ZONE_MIN_PIXELS", "25"))
+
+# -----------------------------
+# Imagery cache
+# -----------------------------
+IMAGERY_CACHE_DIR = Path(os.getenv("SMART_FARM_IMAGERY_CACHE_DIR", BASE_DIR / "imagery_cache"))
+# Tile grid in degrees (~2.8 km) and pixels per tile side (~10.9 m/pixel)
+IMAGERY_TILE_DEG = float(os.getenv("SMART_FARM_IMAGERY_TILE_DEG", "0.025"))
+IMAGERY_TILE_PIXELS = int(os.getenv("SMART_FARM_IMAGERY_TILE_PIXELS", "256"))
+IMAGERY_CACHE_MAX_BYTES = int(os.getenv("SMART_FARM_IMAGERY_CACHE_MAX_BYTES", str(5 * 1024 ** 3)))
+
+# -----------------------------
+# Upstream fetching
+# -----------------------------
+FETCH_CONCURRENCY = int(os.getenv("SMART_FARM_FETCH_CONCURRENCY", "16"))
+FETCH_TIMEOUT = float(os.getenv("SMART_FARM_FETCH_TIMEOUT", "30"))
+
+# Upstream HTTP: "live", "record" (write responses to the archive) or
+# "replay" (serve only from the archive, no network)
+HTTP_MODE = os.getenv("SMART_FARM_HTTP_MODE", "live").lower()
+HTTP_ARCHIVE_DIR = Path(os.getenv("SMART_FARM_HTTP_ARCHIVE", BASE_DIR / "http_archive"))
+
+# -----------------------------
+# Stage timing
+# -----------------------------
+# Per-stage spans feed the Server-Timing header and /metrics histograms;
+# when off, span() is a shared no-op
+TIMING_ENABLED = os.getenv("SMART_FARM_TIMING", "1") == "1"
+TIMING_BUCKETS = tuple(
+    float(b) for b in os.getenv(
+        "SMART_FARM_TIMING_BUCKETS", "0.005,0.01,0.025,0.05,0.1,0.25,0.5,1,2.5,5,10,30,60"
+    ).split(",")
+)
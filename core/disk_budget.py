@@ -0,0 +1,54 @@
+import threading
+from pathlib import Path
+
+
+# -----------------------------
+# Byte-bounded directory
+# -----------------------------
+# Shared by the on-disk stores: a running byte total (scanned once, then
+# bumped per write) and, when it exceeds max_bytes, eviction of the least
+# recently used files. Stores refresh a file's mtime on every read.
+class DiskBudget:
+    def __init__(self, root, max_bytes, pattern="*.npy", recursive=False):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.pattern = pattern
+        self.recursive = recursive
+        self._lock = threading.Lock()
+        self._bytes = None
+
+    def scan(self):
+        # Files can vanish mid-scan (concurrent eviction)
+        paths = self.root.rglob(self.pattern) if self.recursive else self.root.glob(self.pattern)
+        files = []
+        for path in paths:
+            try:
+                files.append((path, path.stat()))
+            except FileNotFoundError:
+                pass
+        return files
+
+    def account(self, added):
+        with self._lock:
+            if self._bytes is None:
+                self._bytes = sum(st.st_size for _, st in self.scan())
+            else:
+                self._bytes += added
+            over = self.max_bytes is not None and self._bytes > self.max_bytes
+        if over:
+            self.evict()
+
+    def evict(self):
+        # Full scan only when over budget; oldest-used files go first. Open
+        # memory maps of evicted files stay valid until they are closed.
+        if self.max_bytes is None or not self.root.exists():
+            return
+        files = self.scan()
+        total = sum(st.st_size for _, st in files)
+        for path, st in sorted(files, key=lambda f: f[1].st_mtime):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= st.st_size
+        with self._lock:
+            self._bytes = total
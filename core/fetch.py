@@ -0,0 +1,72 @@
+import asyncio
+
+import httpx
+
+from core import config
+from core.imagery_cache import imagery_cache, sentinelhub_fetch
+from core.timing import span
+
+
+# -----------------------------
+# Async input acquisition
+# -----------------------------
+# One pooled HTTP client for the process plus a semaphore bounding how many
+# upstream fetches run at once. Weather and every (band, date) tile are
+# requested together, so a cold request waits for the slowest fetch, not
+# the sum of them.
+class InputFetcher:
+    def __init__(self, concurrency=config.FETCH_CONCURRENCY, timeout=config.FETCH_TIMEOUT):
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.client = None
+        self._slots = None
+
+    async def start(self, transport=None):
+        if self.client is None:
+            limits = httpx.Limits(max_connections=self.concurrency,
+                                  max_keepalive_connections=self.concurrency)
+            self.client = httpx.AsyncClient(limits=limits, timeout=self.timeout, transport=transport)
+            self._slots = asyncio.Semaphore(self.concurrency)
+        return self
+
+    async def aclose(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    async def get_json(self, url, params=None):
+        async with self._slots:
+            response = await self.client.get(url, params=params)
+        response.raise_for_status()
+        return response.json()
+
+    async def fetch_band(self, bbox, band, date, fetch=sentinelhub_fetch, cache=imagery_cache):
+        # Sentinel Hub's client is synchronous; each tile is fetched off the
+        # event loop in its own slot, going through the tile cache so repeats
+        # never hit the network, and the tiles are mosaicked once all arrive
+        xs, ys = cache.tiles_for_bbox(bbox)
+        keys = [(ix, iy) for iy in ys for ix in xs]
+
+        async def tile(ix, iy):
+            async with self._slots:
+                return await asyncio.to_thread(cache.get_tile, ix, iy, band, date, fetch)
+
+        tiles = await asyncio.gather(*(tile(ix, iy) for ix, iy in keys))
+        return await asyncio.to_thread(cache.mosaic, bbox, dict(zip(keys, tiles)))
+
+    async def fetch_bands(self, bbox, bands, dates, fetch=sentinelhub_fetch, cache=imagery_cache):
+        keys = [(band, date) for band in bands for date in dates]
+        arrays = await asyncio.gather(*(self.fetch_band(bbox, b, d, fetch, cache) for b, d in keys))
+        return dict(zip(keys, arrays))
+
+    async def acquire(self, bbox, bands=(), dates=(), weather_url=None, weather_params=None,
+                      fetch=sentinelhub_fetch, cache=imagery_cache):
+        tasks = [self.fetch_bands(bbox, bands, dates, fetch, cache)]
+        if weather_url is not None:
+            tasks.append(self.get_json(weather_url, weather_params))
+        with span("fetch"):
+            results = await asyncio.gather(*tasks)
+        return {"bands": results[0], "weather": results[1] if weather_url is not None else None}
+
+
+fetcher = InputFetcher()
@@ -0,0 +1,155 @@
+import math
+import os
+import re
+import tempfile
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from core import config
+from core.disk_budget import DiskBudget
+
+# Band names and dates become path components
+_COMPONENT_RE = re.compile(r"^[A-Za-z0-9_-][A-Za-z0-9_.-]*$")
+
+# Tiles hash onto a fixed set of locks, so the lock table stays bounded
+_LOCK_STRIPES = 256
+
+
+# -----------------------------
+# Tile-aligned imagery cache
+# -----------------------------
+# Scenes are cached per (grid tile, band, acquisition date) on a fixed
+# lat/lon grid, so any two bboxes that overlap share the tiles they have in
+# common and each tile is downloaded once. Disk use is capped by evicting
+# the least recently read tiles.
+class ImageryCache:
+    def __init__(self, root=config.IMAGERY_CACHE_DIR, tile_deg=config.IMAGERY_TILE_DEG,
+                 tile_pixels=config.IMAGERY_TILE_PIXELS, max_bytes=config.IMAGERY_CACHE_MAX_BYTES):
+        self.root = Path(root)
+        self.tile_deg = tile_deg
+        self.tile_pixels = tile_pixels
+        self._budget = DiskBudget(self.root, max_bytes, recursive=True)
+        self._locks = [threading.Lock() for _ in range(_LOCK_STRIPES)]
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    # ---- grid geometry ----
+    def tiles_for_bbox(self, bbox):
+        min_lon, min_lat, max_lon, max_lat = bbox
+        ix0, ix1 = math.floor(min_lon / self.tile_deg), math.ceil(max_lon / self.tile_deg)
+        iy0, iy1 = math.floor(min_lat / self.tile_deg), math.ceil(max_lat / self.tile_deg)
+        return range(ix0, max(ix1, ix0 + 1)), range(iy0, max(iy1, iy0 + 1))
+
+    def tile_bbox(self, ix, iy):
+        d = self.tile_deg
+        return [ix * d, iy * d, (ix + 1) * d, (iy + 1) * d]
+
+    def _path(self, ix, iy, band, date):
+        band, date = str(band), str(date)
+        for name, value in (("band", band), ("date", date)):
+            if not _COMPONENT_RE.match(value):
+                raise ValueError(f"Invalid {name} {value!r}")
+        return self.root / band / date / f"{int(ix)}_{int(iy)}.npy"
+
+    def _lock_for(self, key):
+        return self._locks[hash(key) % len(self._locks)]
+
+    def _count(self, name):
+        with self._stats_lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    # ---- tiles ----
+    # fetch(tile_bbox, band, date, size) -> (size, size) array, row 0 north
+    def get_tile(self, ix, iy, band, date, fetch):
+        path = self._path(ix, iy, band, date)
+        # Per-tile lock: concurrent requests for one tile trigger one download.
+        # evict() does not take it, so a tile deleted under us is refetched.
+        with self._lock_for((ix, iy, str(band), str(date))):
+            try:
+                os.utime(path)  # mtime doubles as last-used time for eviction
+                tile = np.load(path, mmap_mode="r")
+                self._count("hits")
+                return tile
+            except FileNotFoundError:
+                pass
+
+            self._count("misses")
+            size = (self.tile_pixels, self.tile_pixels)
+            tile = np.asarray(fetch(self.tile_bbox(ix, iy), band, date, size))
+            if tile.shape[:2] != size:
+                raise ValueError(f"Fetched tile has shape {tile.shape}, expected {size}")
+
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, tile, allow_pickle=False)
+                written = f.tell()
+            os.replace(tmp, path)
+
+        self._budget.account(written)
+        return tile
+
+    def get(self, bbox, band, date, fetch):
+        xs, ys = self.tiles_for_bbox(bbox)
+        tiles = {(ix, iy): self.get_tile(ix, iy, band, date, fetch) for iy in ys for ix in xs}
+        return self.mosaic(bbox, tiles)
+
+    # tiles: {(ix, iy): tile} covering tiles_for_bbox(bbox)
+    def mosaic(self, bbox, tiles):
+        xs, ys = self.tiles_for_bbox(bbox)
+        px = self.tile_pixels
+
+        rows = []
+        for iy in reversed(ys):  # northernmost tiles first
+            rows.append(np.concatenate([tiles[ix, iy] for ix in xs], axis=1))
+        mosaic = np.concatenate(rows, axis=0)
+
+        # Crop the tile mosaic back to the requested bbox
+        min_lon, min_lat, max_lon, max_lat = bbox
+        scale = px / self.tile_deg
+        left, top = xs.start * self.tile_deg, (ys.stop) * self.tile_deg
+        c0 = int(math.floor((min_lon - left) * scale))
+        c1 = max(int(math.ceil((max_lon - left) * scale)), c0 + 1)
+        r0 = int(math.floor((top - max_lat) * scale))
+        r1 = max(int(math.ceil((top - min_lat) * scale)), r0 + 1)
+        return np.array(mosaic[r0:r1, c0:c1])
+
+    def evict(self):
+        self._budget.evict()
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
+
+
+# -----------------------------
+# Sentinel Hub fetcher
+# -----------------------------
+# Single-band Sentinel-2 L2A fetch for one tile, usable as `fetch` above.
+def sentinelhub_fetch(tile_bbox, band, date, size, sh_config=None):
+    from sentinelhub import BBox, CRS, DataCollection, MimeType, SentinelHubRequest
+
+    evalscript = f"""
+//VERSION=3
+function setup() {{
+  return {{input: ["{band}"], output: {{bands: 1, sampleType: "FLOAT32"}}}};
+}}
+function evaluatePixel(s) {{ return [s.{band}]; }}
+"""
+    request = SentinelHubRequest(
+        evalscript=evalscript,
+        input_data=[SentinelHubRequest.input_data(
+            data_collection=DataCollection.SENTINEL2_L2A,
+            time_interval=(str(date), str(date)),
+        )],
+        responses=[SentinelHubRequest.output_response("default", MimeType.TIFF)],
+        bbox=BBox(tile_bbox, crs=CRS.WGS84),
+        size=size,
+        config=sh_config,
+    )
+    return request.get_data()[0]
+
+
+imagery_cache = ImageryCache()
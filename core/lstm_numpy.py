@@ -0,0 +1,269 @@
+import argparse
+import json
+
+import numpy as np
+
+from core import config
+
+_ACTIVATIONS = {
+    "linear": lambda x: x,
+    "tanh": np.tanh,
+    "sigmoid": lambda x: 1.0 / (1.0 + np.exp(-x)),
+    "hard_sigmoid": lambda x: np.clip(0.2 * x + 0.5, 0.0, 1.0),
+    "relu": lambda x: np.maximum(x, 0.0),
+}
+
+_SUPPORTED_LAYERS = ("LSTM", "Dense")
+
+
+# -----------------------------
+# Scaler
+# -----------------------------
+# Same arithmetic as sklearn's MinMaxScaler, without importing sklearn
+class MinMaxScalerParams:
+    def __init__(self, min_, scale_):
+        self.min_ = np.asarray(min_, dtype=np.float64)
+        self.scale_ = np.asarray(scale_, dtype=np.float64)
+
+    @classmethod
+    def from_sklearn(cls, scaler):
+        return cls(scaler.min_, scaler.scale_)
+
+    def transform(self, X):
+        return np.asarray(X, dtype=np.float64) * self.scale_ + self.min_
+
+    def inverse_transform(self, X):
+        return (np.asarray(X, dtype=np.float64) - self.min_) / self.scale_
+
+
+# -----------------------------
+# Model
+# -----------------------------
+# Forward pass of a Sequential stack of LSTM / Dense layers in plain NumPy.
+# Exposes the subset of the Keras model API the pipeline relies on.
+class NumpyLSTMModel:
+    def __init__(self, layers, input_shape):
+        self.layers = layers
+        self.input_shape = tuple(input_shape)
+
+    @property
+    def output_shape(self):
+        return (None, self.layers[-1]["config"]["units"])
+
+    @classmethod
+    def from_h5(cls, path):
+        import h5py
+
+        with h5py.File(path, "r") as f:
+            model_config = f.attrs["model_config"]
+            if isinstance(model_config, bytes):
+                model_config = model_config.decode("utf-8")
+            spec = json.loads(model_config)["config"]
+
+            layers = []
+            input_shape = None
+            for layer in spec["layers"]:
+                name, cfg = layer["class_name"], layer["config"]
+                if name == "InputLayer":
+                    input_shape = cfg.get("batch_shape") or cfg.get("batch_input_shape")
+                    continue
+                if name not in _SUPPORTED_LAYERS:
+                    raise ValueError(f"Unsupported layer for NumPy backend: {name}")
+
+                group = f["model_weights"][cfg["name"]]
+                weights = [np.asarray(group[w], dtype=np.float32)
+                           for w in group.attrs["weight_names"]]
+                layers.append(_layer_from_config(name, cfg, weights))
+
+        return cls(layers, input_shape or spec.get("build_input_shape"))
+
+    @classmethod
+    def from_npz(cls, path):
+        data = np.load(path, allow_pickle=False)
+        meta = json.loads(str(data["__meta__"]))
+        layers = []
+        for i, layer in enumerate(meta["layers"]):
+            weights = [data[f"{i}/{k}"] for k in range(layer["n_weights"])]
+            layers.append(_layer_from_config(layer["class_name"], layer["config"], weights))
+        return cls(layers, meta["input_shape"])
+
+    def save_npz(self, path, scaler=None):
+        arrays = {}
+        layers = []
+        for i, layer in enumerate(self.layers):
+            for k, w in enumerate(layer["weights"]):
+                arrays[f"{i}/{k}"] = w
+            layers.append({
+                "class_name": layer["class_name"],
+                "config": layer["config"],
+                "n_weights": len(layer["weights"]),
+            })
+        if scaler is not None:
+            arrays["scaler/min_"] = np.asarray(scaler.min_)
+            arrays["scaler/scale_"] = np.asarray(scaler.scale_)
+
+        meta = {"input_shape": list(self.input_shape), "layers": layers}
+        np.savez(path, __meta__=np.array(json.dumps(meta)), **arrays)
+
+    def predict(self, x, verbose=0, batch_size=None):
+        x = np.asarray(x, dtype=np.float32)
+        for layer in self.layers:
+            x = layer["forward"](x)
+        return x
+
+    __call__ = predict
+
+
+def load_scaler_from_npz(path):
+    data = np.load(path, allow_pickle=False)
+    if "scaler/min_" not in data:
+        return None
+    return MinMaxScalerParams(data["scaler/min_"], data["scaler/scale_"])
+
+
+def _layer_from_config(name, cfg, weights):
+    # Only the config keys the forward pass needs are kept
+    if name == "LSTM":
+        keep = ("name", "units", "activation", "recurrent_activation",
+                "return_sequences", "go_backwards", "use_bias")
+    else:
+        keep = ("name", "units", "activation", "use_bias")
+    cfg = {k: cfg[k] for k in keep if k in cfg}
+
+    if name == "LSTM":
+        forward = _lstm_forward(cfg, *weights)
+    else:
+        forward = _dense_forward(cfg, *weights)
+    return {"class_name": name, "config": cfg, "weights": weights, "forward": forward}
+
+
+def _dense_forward(cfg, kernel, bias=None):
+    activation = _ACTIVATIONS[cfg.get("activation", "linear")]
+
+    def forward(x):
+        y = x @ kernel
+        if bias is not None:
+            y = y + bias
+        return activation(y)
+
+    return forward
+
+
+def _lstm_forward(cfg, kernel, recurrent_kernel, bias=None):
+    units = cfg["units"]
+    act = _ACTIVATIONS[cfg.get("activation", "tanh")]
+    rec_act = _ACTIVATIONS[cfg.get("recurrent_activation", "sigmoid")]
+    return_sequences = cfg.get("return_sequences", False)
+    go_backwards = cfg.get("go_backwards", False)
+
+    def forward(x):
+        if go_backwards:
+            x = x[:, ::-1]
+        n, timesteps, _ = x.shape
+
+        # Input projection for every timestep in one matmul; only the
+        # recurrent term has to stay inside the time loop
+        z_x = x @ kernel
+        if bias is not None:
+            z_x = z_x + bias
+
+        h = np.zeros((n, units), dtype=np.float32)
+        c = np.zeros((n, units), dtype=np.float32)
+        outputs = np.empty((n, timesteps, units), dtype=np.float32) if return_sequences else None
+
+        for t in range(timesteps):
+            z = z_x[:, t] + h @ recurrent_kernel
+            # Keras gate order: input, forget, cell, output
+            i = rec_act(z[:, :units])
+            f = rec_act(z[:, units:2 * units])
+            g = act(z[:, 2 * units:3 * units])
+            o = rec_act(z[:, 3 * units:])
+            c = f * c + i * g
+            h = o * act(c)
+            if return_sequences:
+                outputs[:, t] = h
+
+        return outputs if return_sequences else h
+
+    return forward
+
+
+# -----------------------------
+# Multi-cell forecasting
+# -----------------------------
+# cells: (cells, timesteps, features) in physical units. Every grid cell is
+# a row of the batch, so each LSTM step is one matmul over all cells; chunks
+# only bound the (cells, timesteps, 4 * units) input projection in memory.
+def forecast_cells(model, scaler, cells, chunk_size=config.WEATHER_GRID_CHUNK_CELLS):
+    cells = np.asarray(cells, dtype=np.float32)
+    n, timesteps, features = cells.shape
+
+    scaled = scaler.transform(cells.reshape(-1, features)).astype(np.float32)
+    scaled = scaled.reshape(n, timesteps, features)
+
+    out = None
+    for start in range(0, n, chunk_size):
+        pred = model.predict(scaled[start:start + chunk_size], verbose=0)
+        if out is None:
+            out = np.empty((n, pred.shape[-1]), dtype=np.float32)
+        out[start:start + len(pred)] = pred
+
+    if out is None:
+        return np.empty((0, model.output_shape[-1]), dtype=np.float32)
+    return scaler.inverse_transform(out).astype(np.float32)
+
+
+# grid: (rows, cols, timesteps, features) -> (rows, cols, outputs)
+def forecast_grid(model, scaler, grid, chunk_size=config.WEATHER_GRID_CHUNK_CELLS):
+    grid = np.asarray(grid, dtype=np.float32)
+    rows, cols, timesteps, features = grid.shape
+    out = forecast_cells(model, scaler, grid.reshape(rows * cols, timesteps, features), chunk_size)
+    return out.reshape(rows, cols, -1)
+
+
+# -----------------------------
+# Export CLI
+# -----------------------------
+# python -m core.lstm_numpy [--check]
+def export(h5_path=config.WEATHER_MODEL_PATH, npz_path=config.WEATHER_NUMPY_WEIGHTS_PATH,
+           scaler_path=config.WEATHER_SCALER_PATH):
+    import joblib
+
+    model = NumpyLSTMModel.from_h5(h5_path)
+    scaler = joblib.load(scaler_path) if scaler_path else None
+    model.save_npz(npz_path, scaler=scaler)
+    return model
+
+
+def check_parity(model, h5_path=config.WEATHER_MODEL_PATH, n_samples=256, atol=1e-4, seed=0):
+    from tensorflow import keras
+
+    keras_model = keras.models.load_model(h5_path, compile=False)
+    _, timesteps, features = keras_model.input_shape
+    x = np.random.default_rng(seed).random((n_samples, timesteps, features), dtype=np.float32)
+
+    expected = keras_model.predict(x, verbose=0)
+    actual = model.predict(x)
+    max_err = float(np.max(np.abs(expected - actual)))
+    if max_err > atol:
+        raise AssertionError(f"NumPy backend diverges from Keras: max abs error {max_err:.2e}")
+    return max_err
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the weather LSTM for the NumPy backend")
+    parser.add_argument("--h5", default=str(config.WEATHER_MODEL_PATH))
+    parser.add_argument("--scaler", default=str(config.WEATHER_SCALER_PATH))
+    parser.add_argument("--out", default=str(config.WEATHER_NUMPY_WEIGHTS_PATH))
+    parser.add_argument("--check", action="store_true", help="compare against the Keras model")
+    args = parser.parse_args(argv)
+
+    model = export(args.h5, args.out, args.scaler)
+    print(f"Exported {args.h5} -> {args.out}")
+    if args.check:
+        reloaded = NumpyLSTMModel.from_npz(args.out)
+        print(f"Parity vs Keras OK (max abs error {check_parity(reloaded, args.h5):.2e})")
+
+
+if __name__ == "__main__":
+    main()
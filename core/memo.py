@@ -0,0 +1,135 @@
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from core.cache import TTLCache
+
+try:
+    import xxhash
+except ImportError:  # pragma: no cover - optional speedup
+    xxhash = None
+
+
+def _hasher():
+    return xxhash.xxh3_128() if xxhash is not None else hashlib.blake2b(digest_size=16)
+
+
+# -----------------------------
+# Input fingerprints
+# -----------------------------
+# Arrays are hashed over their raw buffers (plus dtype/shape), everything
+# else by repr; keyword order does not matter.
+def fingerprint(**kwargs):
+    h = _hasher()
+    for name in sorted(kwargs):
+        value = kwargs[name]
+        h.update(name.encode("utf-8"))
+        if isinstance(value, np.ndarray):
+            value = np.ascontiguousarray(value)
+            h.update(f"{value.dtype.str}{value.shape}".encode("ascii"))
+            h.update(memoryview(value).cast("B"))
+        else:
+            h.update(repr(value).encode("utf-8"))
+    return h.hexdigest()
+
+
+# -----------------------------
+# Memoizer
+# -----------------------------
+# Bounded in-memory LRU in front of an optional on-disk pickle tier.
+class Memoizer:
+    def __init__(self, fn, maxsize=128, ttl=float("inf"), disk_dir=None, disk_max_entries=1024):
+        self.fn = fn
+        self.memory = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_max_entries = disk_max_entries
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def __call__(self, **kwargs):
+        key = fingerprint(**kwargs)
+        result = self.get(key)
+        if result is None:
+            result = self.fn(**kwargs)
+            self.set(key, result)
+        return result
+
+    # Direct access for values derived from the same inputs (e.g. rendered
+    # HTML stored next to the plain outputs under a suffixed fingerprint)
+    def get(self, key):
+        result = self.memory.get(key)
+        if result is not None:
+            self._count("memory_hits")
+            return result
+
+        result = self._disk_get(key)
+        if result is not None:
+            self._count("disk_hits")
+            self.memory.set(key, result)
+            return result
+
+        self._count("misses")
+        return None
+
+    def set(self, key, result):
+        self.memory.set(key, result)
+        self._disk_set(key, result)
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def stats(self):
+        return {"memory_hits": self.memory_hits, "disk_hits": self.disk_hits,
+                "misses": self.misses, "memory_size": len(self.memory)}
+
+    def _disk_get(self, key):
+        if self.disk_dir is None:
+            return None
+        path = self.disk_dir / f"{key}.pkl"
+        try:
+            with open(path, "rb") as f:
+                result = pickle.load(f)
+            os.utime(path)  # mtime doubles as last-used time for eviction
+            return result
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+    def _disk_set(self, key, result):
+        if self.disk_dir is None:
+            return
+        try:
+            payload = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            return  # not every pipeline result is picklable; memory tier only
+
+        tmp = None
+        try:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.disk_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(payload)
+            os.replace(tmp, self.disk_dir / f"{key}.pkl")
+            self._disk_evict()
+        except OSError:
+            # Disk full / unwritable: the result is already in memory
+            if tmp is not None:
+                try:
+                    os.unlink(tmp)
+                except OSError:
+                    pass
+
+    def _disk_evict(self):
+        entries = list(self.disk_dir.glob("*.pkl"))
+        if len(entries) <= self.disk_max_entries:
+            return
+        entries.sort(key=lambda p: p.stat().st_mtime)
+        for path in entries[:len(entries) - self.disk_max_entries]:
+            path.unlink(missing_ok=True)
@@ -0,0 +1,128 @@
+import threading
+
+import numpy as np
+
+from core import config
+from core.batching import MicroBatcher
+from core.timing import span
+
+
+# -----------------------------
+# Model Registry
+# -----------------------------
+# Holds the weather LSTM and its scaler for the lifetime of the process so
+# that requests never pay for TensorFlow / joblib deserialization.
+class ModelRegistry:
+    def __init__(self, model_path=config.WEATHER_MODEL_PATH,
+                 scaler_path=config.WEATHER_SCALER_PATH,
+                 backend=config.WEATHER_BACKEND):
+        self.model_path = model_path
+        self.scaler_path = scaler_path
+        self.backend = backend
+        self._model = None
+        self._scaler = None
+        self._lock = threading.Lock()
+        self.batcher = MicroBatcher(
+            self._predict_direct,
+            max_batch_size=config.WEATHER_BATCH_MAX_SIZE,
+            max_wait_ms=config.WEATHER_BATCH_WINDOW_MS,
+        )
+
+    @property
+    def loaded(self):
+        return self._model is not None
+
+    def load(self, warmup=config.WEATHER_WARMUP):
+        with self._lock:
+            if self._model is not None:
+                return self
+
+            if self.backend == "numpy":
+                model, scaler = self._load_numpy()
+            elif self.backend == "keras":
+                model, scaler = self._load_keras()
+            else:
+                raise ValueError(f"Unknown weather backend: {self.backend}")
+
+            if warmup:
+                # First call traces the graph; do it here, not in a request
+                _, timesteps, features = model.input_shape
+                model.predict(np.zeros((1, timesteps, features), dtype=np.float32), verbose=0)
+
+            self._model, self._scaler = model, scaler
+            if config.WEATHER_BATCHING:
+                self.batcher.start()
+        return self
+
+    def _load_keras(self):
+        # Heavy imports stay local so importing the registry is cheap
+        import joblib
+        from tensorflow import keras
+
+        model = keras.models.load_model(self.model_path, compile=False)
+        return model, joblib.load(self.scaler_path)
+
+    def _load_numpy(self):
+        # No TensorFlow in the process; sklearn only if the export lacks the scaler
+        from core.lstm_numpy import NumpyLSTMModel, load_scaler_from_npz
+
+        weights_path = config.WEATHER_NUMPY_WEIGHTS_PATH
+        if weights_path.exists():
+            model = NumpyLSTMModel.from_npz(weights_path)
+            scaler = load_scaler_from_npz(weights_path)
+        else:
+            model = NumpyLSTMModel.from_h5(self.model_path)
+            scaler = None
+
+        if scaler is None:
+            import joblib
+            scaler = joblib.load(self.scaler_path)
+        return model, scaler
+
+    def unload(self):
+        self.batcher.stop()
+        with self._lock:
+            self._model = None
+            self._scaler = None
+
+    @property
+    def model(self):
+        if self._model is None:
+            self.load()
+        return self._model
+
+    @property
+    def scaler(self):
+        if self._scaler is None:
+            self.load()
+        return self._scaler
+
+    def predict(self, sequences):
+        # Concurrent callers are coalesced into one forward pass when the
+        # batcher is running; otherwise fall through to a direct call
+        with span("weather.model"):
+            if self.batcher.running:
+                return self.batcher.submit(sequences)
+            return self._predict_direct(sequences)
+
+    def forecast_grid(self, grid):
+        # Per-pixel forecasts for a (rows, cols, timesteps, features) raster
+        from core.lstm_numpy import forecast_grid
+        with span("weather.model"):
+            return forecast_grid(self.model, self.scaler, grid)
+
+    def _predict_direct(self, sequences):
+        sequences = np.asarray(sequences, dtype=np.float32)
+        return self.model.predict(sequences, verbose=0)
+
+
+# Shared handle used by the FastAPI lifespan and the weather pipeline
+registry = ModelRegistry()
+
+
+def get_weather_model():
+    return registry.model
+
+
+def get_weather_scaler():
+    return registry.scaler
@@ -0,0 +1,130 @@
+import hashlib
+import io
+
+import numpy as np
+from PIL import Image
+
+from core.colormap import get_lut
+from core.timing import span
+
+
+# -----------------------------
+# Raster overlays
+# -----------------------------
+# A risk/prescription grid becomes one small PNG plus its lat/lon bounds,
+# instead of a self-contained folium iframe per map.
+def colorize(grid, cmap="RdYlGn_r", vmin=0.0, vmax=1.0):
+    # No-data cells map to the LUT's transparent entry
+    return get_lut(cmap, vmin, vmax).apply(grid)
+
+
+def encode_png(rgba):
+    buf = io.BytesIO()
+    Image.fromarray(np.ascontiguousarray(rgba, dtype=np.uint8)).save(buf, format="PNG", optimize=True)
+    return buf.getvalue()
+
+
+def content_key(data):
+    return hashlib.sha1(data).hexdigest()[:20]
+
+
+# grid: row 0 is the northern edge (image orientation), as Leaflet expects
+def grid_overlay(name, grid, min_lat, min_lon, max_lat, max_lon, **colorize_kwargs):
+    with span("colorize"):
+        rgba = colorize(grid, **colorize_kwargs)
+    with span("png_encode"):
+        png = encode_png(rgba)
+    key = content_key(png)
+    layer = {
+        "name": name,
+        "url": f"/overlays/{key}.png",
+        "bounds": [[min_lat, min_lon], [max_lat, max_lon]],
+    }
+    return key, png, layer
+
+
+# -----------------------------
+# Single-overlay folium maps
+# -----------------------------
+# One ImageOverlay (served from /overlays/{key}.png) plus a legend, so the
+# map's HTML size no longer grows with the number of pixels.
+_EMPTY_PNG_URL = "data:image/png;base64,"
+
+
+def raster_map(name, grid, min_lat, min_lon, max_lat, max_lon, cmap="YlGnBu",
+               vmin=None, vmax=None, caption=None):
+    import folium
+    from branca.colormap import LinearColormap
+
+    grid = np.asarray(grid, dtype=np.float32)
+    finite = grid[np.isfinite(grid)]
+    if vmin is None:
+        vmin = float(finite.min()) if finite.size else 0.0
+    if vmax is None:
+        vmax = float(finite.max()) if finite.size else 1.0
+
+    key, png, layer = grid_overlay(name, grid, min_lat, min_lon, max_lat, max_lon,
+                                   cmap=cmap, vmin=vmin, vmax=vmax)
+
+    m = folium.Map(location=[(min_lat + max_lat) / 2, (min_lon + max_lon) / 2])
+    overlay = folium.raster_layers.ImageOverlay(
+        image=_EMPTY_PNG_URL, bounds=layer["bounds"], opacity=0.7, name=name
+    )
+    # folium only accepts absolute URLs or files; point it at our route after
+    overlay.url = layer["url"]
+    overlay.add_to(m)
+    m.fit_bounds(layer["bounds"])
+
+    legend_colors = [tuple(c / 255.0) for c in get_lut(cmap, vmin, vmax, 16).table[:-1]]
+    LinearColormap(legend_colors, vmin=vmin, vmax=max(vmax, vmin + 1e-9),
+                   caption=caption or name).add_to(m)
+    return m, key, png
+
+
+# -----------------------------
+# Shared Leaflet page
+# -----------------------------
+# Static and cacheable: Leaflet JS/CSS load once, then the page pulls the
+# overlay spec whose key is given in ?spec=<key> and adds each layer as an
+# image overlay. Only our own /overlays/<key>.json is ever fetched, and layer
+# names are escaped because Leaflet inserts them as HTML.
+LEAFLET_PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8" />
+<link rel="stylesheet" href="https://unpkg.com/leaflet@1.9.4/dist/leaflet.css" />
+<script src="https://unpkg.com/leaflet@1.9.4/dist/leaflet.js"></script>
+<style>html, body, #map { height: 100%; margin: 0; }</style>
+</head>
+<body>
+<div id="map"></div>
+<script>
+var map = L.map("map");
+L.tileLayer("https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png", {
+    attribution: "&copy; OpenStreetMap contributors"
+}).addTo(map);
+var control = L.control.layers(null, null, {collapsed: false}).addTo(map);
+
+function escapeHtml(text) {
+    var div = document.createElement("div");
+    div.textContent = String(text);
+    return div.innerHTML;
+}
+
+function showOverlays(spec) {
+    var first = true;
+    spec.layers.forEach(function (layer) {
+        var overlay = L.imageOverlay(layer.url, layer.bounds, {opacity: 0.7});
+        control.addOverlay(overlay, escapeHtml(layer.name));
+        if (first) { overlay.addTo(map); map.fitBounds(layer.bounds); first = false; }
+    });
+}
+
+var spec = new URLSearchParams(window.location.search).get("spec");
+if (spec && /^[0-9a-f]{20}$/.test(spec)) {
+    fetch("/overlays/" + spec + ".json").then(function (r) { return r.json(); }).then(showOverlays);
+}
+</script>
+</body>
+</html>
+"""
@@ -0,0 +1,161 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from core import config
+from core.tiling import expand_tile, iter_tiles
+
+
+# -----------------------------
+# Shared-memory arrays
+# -----------------------------
+def _share(array):
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    view = np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)
+    view[...] = array
+    return shm, (shm.name, array.shape, array.dtype.str)
+
+
+def _attach(spec):
+    name, shape, dtype = spec
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+
+
+# Runs in the worker process: map the shared inputs/output, compute one
+# tile and write it in place. Only names and slices cross the process
+# boundary, never raster data.
+def _process_tile(fn, input_specs, output_spec, tile, halo, kwargs):
+    handles = []
+    try:
+        inputs = {}
+        for name, spec in input_specs.items():
+            shm, array = _attach(spec)
+            handles.append(shm)
+            inputs[name] = array
+        shm, out = _attach(output_spec)
+        handles.append(shm)
+
+        read, crop = expand_tile(tile, halo, out.shape)
+        result = np.asarray(fn(**{k: v[read] for k, v in inputs.items()}, **kwargs))
+        out[tile] = result[crop]
+    finally:
+        for shm in handles:
+            shm.close()
+
+
+# -----------------------------
+# Worker pool
+# -----------------------------
+# One long-lived pool per worker count, started lazily from a forkserver (or
+# spawn) context so workers are never forked from the threaded server.
+# shutdown() is called from the app lifespan.
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _context():
+    method = config.PARALLEL_START_METHOD
+    if method not in multiprocessing.get_all_start_methods():
+        method = "spawn"
+    return multiprocessing.get_context(method)
+
+
+def get_pool(workers=config.PARALLEL_WORKERS):
+    with _pools_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            pool = _pools[workers] = ProcessPoolExecutor(max_workers=workers, mp_context=_context())
+        return pool
+
+
+def shutdown():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _discard(workers, pool):
+    with _pools_lock:
+        if _pools.get(workers) is pool:
+            del _pools[workers]
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+# -----------------------------
+# Parallel tiled execution
+# -----------------------------
+# Same contract as core.tiling.run_tiled, with tiles fanned out over a pool.
+# "process" needs fn to be a picklable module-level function and shares the
+# rasters through multiprocessing.shared_memory; "thread" suits functions
+# that spend their time in GIL-releasing NumPy kernels.
+def run_tiled_parallel(fn, rasters, tile_size=config.TILE_SIZE, halo=0,
+                       workers=config.PARALLEL_WORKERS, backend=config.PARALLEL_BACKEND,
+                       dtype=np.float32, **kwargs):
+    rasters = {k: np.ascontiguousarray(v) for k, v in rasters.items()}
+    shape = next(iter(rasters.values())).shape[:2]
+    for name, raster in rasters.items():
+        if raster.shape[:2] != shape:
+            raise ValueError(f"{name} has shape {raster.shape}, expected {shape}")
+
+    tiles = list(iter_tiles(shape, tile_size))
+
+    # First tile in-process: tells us the output's trailing dims
+    read, crop = expand_tile(tiles[0], halo, shape)
+    first = np.asarray(fn(**{k: v[read] for k, v in rasters.items()}, **kwargs))[crop]
+    out = np.empty(shape + first.shape[2:], dtype=dtype)
+    out[tiles[0]] = first
+    rest = tiles[1:]
+    if not rest:
+        return out
+
+    if backend == "thread":
+        def run(tile):
+            read, crop = expand_tile(tile, halo, shape)
+            out[tile] = np.asarray(fn(**{k: v[read] for k, v in rasters.items()}, **kwargs))[crop]
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(run, rest))
+        return out
+
+    if backend != "process":
+        raise ValueError(f"Unknown parallel backend: {backend}")
+
+    blocks = []
+    try:
+        input_specs = {}
+        for name, raster in rasters.items():
+            shm, spec = _share(raster)
+            blocks.append(shm)
+            input_specs[name] = spec
+        out_shm, output_spec = _share(out)
+        blocks.append(out_shm)
+
+        pool = get_pool(workers)
+        futures = [pool.submit(_process_tile, fn, input_specs, output_spec, tile, halo, kwargs)
+                   for tile in rest]
+        try:
+            for future in futures:
+                future.result()
+        except BrokenProcessPool:
+            # A worker died; the next call starts a fresh pool
+            _discard(workers, pool)
+            raise
+        except BaseException:
+            # Shared blocks are unlinked below; stop tiles still queued
+            for future in futures:
+                future.cancel()
+            raise
+
+        out[...] = np.ndarray(out.shape, dtype=out.dtype, buffer=out_shm.buf)
+        return out
+    finally:
+        for shm in blocks:
+            shm.close()
+            shm.unlink()
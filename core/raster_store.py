@@ -0,0 +1,78 @@
+import hashlib
+import os
+import re
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from core import config
+from core.disk_budget import DiskBudget
+
+_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+
+# -----------------------------
+# Content-addressed raster store
+# -----------------------------
+# Rasters are uploaded once and saved as .npy named by a hash of their
+# dtype, shape and bytes. Reads are memory-mapped, so referencing a stored
+# raster costs a file open instead of a JSON upload. Maps are copy-on-write
+# so pipelines can modify their inputs without touching the stored file.
+# Disk use is capped by evicting the least recently used rasters; an
+# evicted ID reads as unknown and has to be uploaded again.
+class RasterStore:
+    def __init__(self, root=config.RASTER_STORE_DIR, max_bytes=config.RASTER_STORE_MAX_BYTES):
+        self.root = Path(root)
+        self._budget = DiskBudget(self.root, max_bytes)
+
+    def _path(self, raster_id):
+        if not _ID_RE.match(raster_id):
+            raise KeyError(raster_id)
+        return self.root / f"{raster_id}.npy"
+
+    @staticmethod
+    def raster_id(array):
+        h = hashlib.sha256()
+        h.update(f"{array.dtype.str}{array.shape}".encode("ascii"))
+        h.update(memoryview(np.ascontiguousarray(array)).cast("B"))
+        return h.hexdigest()[:32]
+
+    def put(self, array):
+        array = np.ascontiguousarray(array)
+        raster_id = self.raster_id(array)
+        path = self._path(raster_id)
+        if not path.exists():
+            self.root.mkdir(parents=True, exist_ok=True)
+            # Write-then-rename so readers never see a partial file
+            fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    np.save(f, array, allow_pickle=False)
+                    written = f.tell()
+                os.replace(tmp, path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+            self._budget.account(written)
+        return raster_id
+
+    def get(self, raster_id):
+        path = self._path(raster_id)
+        try:
+            os.utime(path)  # mtime doubles as last-used time for eviction
+            return np.load(path, mmap_mode="c", allow_pickle=False)
+        except FileNotFoundError:
+            raise KeyError(raster_id)
+
+    def __contains__(self, raster_id):
+        try:
+            return self._path(raster_id).exists()
+        except KeyError:
+            return False
+
+    def evict(self):
+        self._budget.evict()
+
+
+raster_store = RasterStore()
@@ -0,0 +1,49 @@
+import io
+import threading
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from core import config
+from core.timing import span
+
+# Caps concurrent rasterizations so a burst of requests cannot pin every
+# threadpool worker inside Agg at once
+_render_slots = threading.BoundedSemaphore(config.RENDER_CONCURRENCY)
+
+# pyplot's figure manager registry is process-global and not thread-safe
+_pyplot_lock = threading.Lock()
+
+
+# -----------------------------
+# Figure rendering
+# -----------------------------
+# Code running in threadpool workers must not build figures through pyplot
+# (plt.figure / plt.subplots / plt.gca): that state is shared by every
+# thread. new_figure() builds one that pyplot never sees; close_figure()
+# only exists to dispose of figures that older code made via pyplot.
+def new_figure(nrows=1, ncols=1, figsize=None, dpi=None, **subplots_kwargs):
+    fig = Figure(figsize=figsize, dpi=dpi)
+    FigureCanvasAgg(fig)
+    return fig, fig.subplots(nrows, ncols, **subplots_kwargs)
+
+
+def render_png(fig, **savefig_kwargs):
+    with _render_slots, span("plot_render"):
+        try:
+            # Bind a private Agg canvas so rendering never goes through the
+            # pyplot backend/state of whichever thread created the figure
+            FigureCanvasAgg(fig)
+            buf = io.BytesIO()
+            fig.savefig(buf, format="png", **savefig_kwargs)
+            return buf.getvalue()
+        finally:
+            close_figure(fig)
+
+
+def close_figure(fig):
+    # Figures made via plt.subplots() stay referenced by pyplot until closed
+    with _pyplot_lock:
+        import matplotlib.pyplot as plt
+        plt.close(fig)
+    fig.clear()
@@ -0,0 +1,149 @@
+import copy
+import hashlib
+import json
+from pathlib import Path
+
+import httpx
+
+from core import config
+
+# Credentials never become part of a recording key (nor of the stored request)
+_SECRET_PARAMS = (
+    "Authorization", "Proxy-Authorization", "X-API-Key", "access_token", "api_key",
+    "apikey", "client_id", "client_secret",
+)
+
+# Token fields in recorded response bodies (e.g. the Sentinel Hub OAuth
+# token endpoint) are replaced, so the archive can be shared; replayed
+# clients still get a well-formed token response
+_SECRET_FIELDS = ("access_token", "refresh_token", "id_token")
+_REDACTED = "REDACTED"
+
+
+# -----------------------------
+# Record / replay of upstream HTTP
+# -----------------------------
+# "live": normal network access. "record": every upstream response is
+# written to the archive as it passes through. "replay": responses come
+# only from the archive and a missing one is an error, so benchmarks and CI
+# run fully offline and deterministically.
+#
+# requests-based clients (Sentinel Hub, weather APIs) are covered by a
+# global requests-cache session; the httpx fetcher uses ReplayTransport.
+def install(mode=config.HTTP_MODE, archive=config.HTTP_ARCHIVE_DIR):
+    if mode == "live":
+        return
+    if mode not in ("record", "replay"):
+        raise ValueError(f"Unknown HTTP mode: {mode}")
+
+    import requests_cache
+    from requests_cache.serializers import SerializerPipeline, Stage, pickle_serializer
+
+    serializer = SerializerPipeline(
+        [Stage(dumps=_scrub_cached, loads=lambda response: response), *pickle_serializer.stages],
+        name="scrubbed-pickle",
+        is_binary=True,
+    )
+    archive = Path(archive)
+    archive.mkdir(parents=True, exist_ok=True)
+    requests_cache.install_cache(
+        str(archive / "requests"),
+        backend="sqlite",
+        serializer=serializer,
+        allowable_methods=("GET", "HEAD", "POST"),
+        expire_after=requests_cache.NEVER_EXPIRE,
+        ignored_parameters=_SECRET_PARAMS,
+        only_if_cached=mode == "replay",
+        read_only=mode == "replay",
+    )
+
+
+def uninstall():
+    import requests_cache
+    requests_cache.uninstall_cache()
+
+
+def transport(mode=config.HTTP_MODE, archive=config.HTTP_ARCHIVE_DIR):
+    # httpx transport for core.fetch.InputFetcher; None means the default
+    if mode == "live":
+        return None
+    return ReplayTransport(Path(archive) / "httpx", mode)
+
+
+def _redact(url):
+    for name in _SECRET_PARAMS:
+        url = url.copy_remove_param(name)
+    return url
+
+
+def _scrub(content):
+    try:
+        body = json.loads(content)
+    except (TypeError, ValueError):
+        return content
+    if not isinstance(body, dict) or not any(name in body for name in _SECRET_FIELDS):
+        return content
+    for name in _SECRET_FIELDS:
+        if name in body:
+            body[name] = _REDACTED
+    return json.dumps(body).encode("utf-8")
+
+
+def _scrub_cached(response):
+    # requests-cache pipeline stage, applied before a response is stored
+    response = copy.copy(response)
+    response._content = _scrub(response._content)
+    return response
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    def __init__(self, root, mode, wrapped=None):
+        self.root = Path(root)
+        self.mode = mode
+        self.wrapped = wrapped or httpx.AsyncHTTPTransport()
+
+    @staticmethod
+    def key(request):
+        h = hashlib.sha256()
+        h.update(request.method.encode("ascii"))
+        h.update(str(_redact(request.url)).encode("utf-8"))
+        h.update(request.content)
+        return h.hexdigest()
+
+    async def handle_async_request(self, request):
+        await request.aread()
+        path = self.root / f"{self.key(request)}.json"
+
+        if self.mode == "replay":
+            if not path.exists():
+                raise httpx.ConnectError(f"No recorded response for {request.method} {request.url}",
+                                         request=request)
+            record = json.loads(path.read_text())
+            return httpx.Response(
+                record["status_code"],
+                headers=record["headers"],
+                content=bytes.fromhex(record["content"]),
+                request=request,
+            )
+
+        response = await self.wrapped.handle_async_request(request)
+        # Wrap in a full Response to get the body decoded; the encoding
+        # headers no longer apply to it and are dropped
+        content = await httpx.Response(
+            response.status_code, headers=response.headers, stream=response.stream
+        ).aread()
+        headers = [(k, v) for k, v in response.headers.items()
+                   if k.lower() not in ("content-encoding", "transfer-encoding", "content-length")]
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({
+            "method": request.method,
+            "url": str(_redact(request.url)),
+            "status_code": response.status_code,
+            "headers": headers,
+            "content": _scrub(content).hex(),
+        }))
+        return httpx.Response(response.status_code, headers=headers, content=content, request=request)
+
+    async def aclose(self):
+        await self.wrapped.aclose()
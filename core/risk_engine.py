@@ -0,0 +1,83 @@
+import numpy as np
+
+from core.timing import span
+
+
+# -----------------------------
+# Shared inputs
+# -----------------------------
+# weather_data / indices_data are converted to float32 arrays exactly once,
+# and any intermediate requested by more than one risk layer (rolling
+# weather windows, vegetation masks, ...) is computed on first use and then
+# reused by every other layer.
+class RiskContext:
+    def __init__(self, weather_data, indices_data, crop_stage):
+        self.weather = {k: np.asarray(v, dtype=np.float32) for k, v in weather_data.items()}
+        self.indices = {k: np.asarray(v, dtype=np.float32) for k, v in indices_data.items()}
+        self.crop_stage = crop_stage
+        self._shared = {}
+
+        grids = [v for v in self.indices.values() if v.ndim == 2]
+        self.shape = grids[0].shape if grids else ()
+
+    def shared(self, name, fn):
+        if name not in self._shared:
+            self._shared[name] = fn(self)
+        return self._shared[name]
+
+    def rolling_mean(self, key, window):
+        # Trailing mean over the last axis via one cumsum, no Python loop
+        def compute(ctx):
+            series = ctx.weather[key]
+            csum = np.cumsum(series, axis=-1, dtype=np.float64)
+            out = csum.copy()
+            out[..., window:] = csum[..., window:] - csum[..., :-window]
+            counts = np.minimum(np.arange(1, series.shape[-1] + 1), window)
+            return (out / counts).astype(np.float32)
+        return self.shared(("rolling_mean", key, window), compute)
+
+    def count_within(self, key, lo, hi, last=None):
+        # Days (or steps) with lo <= value <= hi, optionally over the last N
+        def compute(ctx):
+            series = ctx.weather[key]
+            if last is not None:
+                # Not series[..., -last:], which is the whole series for last=0
+                series = series[..., max(series.shape[-1] - last, 0):]
+            return np.count_nonzero((series >= lo) & (series <= hi), axis=-1).astype(np.float32)
+        return self.shared(("count_within", key, lo, hi, last), compute)
+
+    def index_mask(self, key, lo=-np.inf, hi=np.inf):
+        return self.shared(
+            ("index_mask", key, lo, hi),
+            lambda ctx: (ctx.indices[key] >= lo) & (ctx.indices[key] <= hi),
+        )
+
+
+# -----------------------------
+# Fused engine
+# -----------------------------
+# Risk layers register a function of the shared context and are evaluated
+# together into one preallocated (layers, rows, cols) stack.
+class RiskEngine:
+    def __init__(self):
+        self._layers = {}
+
+    @property
+    def names(self):
+        return list(self._layers)
+
+    def layer(self, name):
+        def register(fn):
+            self._layers[name] = fn
+            return fn
+        return register
+
+    def compute(self, weather_data, indices_data, crop_stage):
+        ctx = RiskContext(weather_data, indices_data, crop_stage)
+        stack = np.empty((len(self._layers),) + ctx.shape, dtype=np.float32)
+        for i, (name, fn) in enumerate(self._layers.items()):
+            # Scalars broadcast over the field; risks are clipped to [0, 1]
+            with span(f"risk.{name}"):
+                np.clip(np.broadcast_to(fn(ctx), ctx.shape), 0.0, 1.0, out=stack[i])
+        # Per-layer views into the one stack, keyed like the pipeline results
+        return dict(zip(self._layers, stack))
@@ -0,0 +1,37 @@
+import datetime
+
+import numpy as np
+
+
+# -----------------------------
+# JSON conversion
+# -----------------------------
+# Turns pipeline outputs (NumPy arrays/scalars, pandas objects, dates) into
+# plain JSON types. Non-finite floats become None since JSON has no NaN.
+def to_jsonable(obj):
+    if isinstance(obj, dict):
+        return {str(k): to_jsonable(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [to_jsonable(v) for v in obj]
+    if isinstance(obj, np.ndarray):
+        if obj.dtype.kind == "f":
+            return np.where(np.isfinite(obj), obj, None).tolist()
+        if obj.dtype.kind in "Mm":
+            return obj.astype(str).tolist()
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return to_jsonable(obj.item())
+    if isinstance(obj, float):
+        return obj if np.isfinite(obj) else None
+    if isinstance(obj, (datetime.date, datetime.datetime)):
+        return obj.isoformat()
+
+    # pandas is optional here; duck-type its containers
+    if hasattr(obj, "to_dict") and hasattr(obj, "index"):
+        if hasattr(obj, "columns"):
+            return to_jsonable({"index": obj.index.to_numpy(),
+                                **{c: obj[c].to_numpy() for c in obj.columns}})
+        return to_jsonable({"index": obj.index.to_numpy(), "values": obj.to_numpy()})
+    if hasattr(obj, "isoformat"):
+        return obj.isoformat()
+    return obj
@@ -0,0 +1,60 @@
+import numpy as np
+
+from core import config
+
+
+# -----------------------------
+# Tiles
+# -----------------------------
+def iter_tiles(shape, tile_size=config.TILE_SIZE):
+    rows, cols = shape[:2]
+    for r0 in range(0, rows, tile_size):
+        for c0 in range(0, cols, tile_size):
+            yield slice(r0, min(r0 + tile_size, rows)), slice(c0, min(c0 + tile_size, cols))
+
+
+def expand_tile(tile, halo, shape):
+    # Tile grown by `halo` pixels on each side (clamped), plus the slice
+    # that crops the grown result back to the tile itself
+    (rs, cs), (rows, cols) = tile, shape[:2]
+    r0, r1 = max(rs.start - halo, 0), min(rs.stop + halo, rows)
+    c0, c1 = max(cs.start - halo, 0), min(cs.stop + halo, cols)
+    read = (slice(r0, r1), slice(c0, c1))
+    crop = (slice(rs.start - r0, rs.stop - r0), slice(cs.start - c0, cs.stop - c0))
+    return read, crop
+
+
+def allocate_output(shape, dtype=np.float32, out_path=None):
+    if out_path is not None:
+        # Disk-backed: peak RAM stays at one tile whatever the field size
+        return np.lib.format.open_memmap(out_path, mode="w+", dtype=dtype, shape=shape)
+    return np.empty(shape, dtype=dtype)
+
+
+# -----------------------------
+# Tiled execution
+# -----------------------------
+# Streams fixed-size tiles of the 2-D `rasters` through a per-pixel function
+# fn(**tile_rasters, **kwargs) -> array shaped like the tile (optionally with
+# trailing channels). Inputs can be memory-mapped (e.g. from the raster
+# store) so only one tile of each is ever resident. Results land in `out`,
+# a preallocated array, or a new .npy memmap at `out_path`.
+def run_tiled(fn, rasters, tile_size=config.TILE_SIZE, halo=0, out=None, out_path=None,
+              dtype=np.float32, **kwargs):
+    shape = next(iter(rasters.values())).shape[:2]
+    for name, raster in rasters.items():
+        if raster.shape[:2] != shape:
+            raise ValueError(f"{name} has shape {raster.shape}, expected {shape}")
+
+    for tile in iter_tiles(shape, tile_size):
+        read, crop = expand_tile(tile, halo, shape)
+        result = np.asarray(fn(**{k: np.asarray(v[read]) for k, v in rasters.items()}, **kwargs))
+        result = result[crop]
+
+        if out is None:
+            out = allocate_output(shape + result.shape[2:], dtype, out_path)
+        out[tile] = result
+
+    if isinstance(out, np.memmap):
+        out.flush()
+    return out
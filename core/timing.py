@@ -0,0 +1,147 @@
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+from functools import wraps
+
+from core import config
+
+ENABLED = config.TIMING_ENABLED
+
+# Spans recorded for the current request; None outside one. The list is
+# shared by reference, so spans closed in threadpool workers (which run on
+# a copy of the request's context) still land on it.
+_spans = contextvars.ContextVar("smart_farm_spans", default=None)
+
+_NOOP = nullcontext()
+
+
+# -----------------------------
+# Histograms
+# -----------------------------
+class Histogram:
+    def __init__(self, name, help, label, buckets=config.TIMING_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._series = {}  # label value -> [per-bucket counts..., +Inf count], sum
+
+    def observe(self, label, value):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label)
+            if series is None:
+                series = self._series[label] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][i] += 1
+            series[1] += value
+
+    def exposition(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = [(label, list(counts), total) for label, (counts, total) in self._series.items()]
+        for label, counts, total in sorted(snapshot):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{self.name}_bucket{{{self.label}="{label}",le="{le}"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{{self.label}="{label}"}} {total}')
+            lines.append(f'{self.name}_count{{{self.label}="{label}"}} {cumulative}')
+        return "\n".join(lines)
+
+
+stage_seconds = Histogram(
+    "smart_farm_stage_seconds", "Wall time per pipeline / rendering stage.", "stage"
+)
+
+
+def metric(name, kind, help, label, samples):
+    # Prometheus text format for simple label -> value samples
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+    lines += [f'{name}{{{label}="{key}"}} {value}' for key, value in samples.items()]
+    return "\n".join(lines)
+
+
+# -----------------------------
+# Spans
+# -----------------------------
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def span(name):
+    return _Span(name) if ENABLED else _NOOP
+
+
+def record(name, seconds):
+    stage_seconds.observe(name, seconds)
+    spans = _spans.get()
+    if spans is not None:
+        spans.append((name, seconds))
+
+
+def timed(name):
+    def decorate(fn):
+        if not ENABLED:
+            return fn
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with _Span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+# -----------------------------
+# Server-Timing
+# -----------------------------
+def server_timing(spans, total):
+    # Repeated stages (e.g. one per map) are summed, first-seen order kept
+    durations = {}
+    for name, seconds in spans:
+        durations[name] = durations.get(name, 0.0) + seconds
+    durations["total"] = total
+    return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in durations.items())
+
+
+class ServerTimingMiddleware:
+    # Plain ASGI so the header is added without buffering the response
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        spans = []
+        token = _spans.set(spans)
+        start = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                header = server_timing(spans, time.perf_counter() - start)
+                message = dict(message, headers=list(message.get("headers", [])) + [
+                    (b"server-timing", header.encode("latin-1"))
+                ])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _spans.reset(token)
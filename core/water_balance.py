@@ -0,0 +1,127 @@
+import hashlib
+import os
+import re
+import tempfile
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from core import config
+
+_FIELD_RE = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+
+# -----------------------------
+# Daily root-zone depletion (FAO-56)
+# -----------------------------
+# One day for every pixel at once:
+#   Dr = clip(Dr_prev - rain - irrigation + Ks * Kc * ET0, 0, TAW)
+# with the water-stress factor Ks dropping linearly once Dr exceeds
+# RAW = p * TAW.
+def step(depletion, et0, rain, kc, taw, p=0.5, irrigation=0.0):
+    raw = p * taw
+    ks = np.clip((taw - depletion) / np.maximum(taw - raw, 1e-6), 0.0, 1.0)
+    etc = ks * kc * et0
+    return np.clip(depletion - rain - irrigation + etc, 0.0, taw)
+
+
+# -----------------------------
+# Per-field tracker
+# -----------------------------
+# Keeps each field's end-of-day depletion on disk, so a request that carries
+# the full ET0/rain history only applies the days not yet seen: O(pixels)
+# per new day rather than O(pixels x days). A digest of the applied prefix
+# detects edited or restarted histories, and a second digest of kc / taw /
+# p / initial_depletion detects new crop or soil inputs (e.g. Kc from a new
+# NDVI scene); either change replays the season from sowing.
+class WaterBalanceTracker:
+    def __init__(self, root=config.WATER_BALANCE_DIR):
+        self.root = Path(root)
+        self._lock = threading.Lock()
+
+    def _path(self, field_id):
+        if not _FIELD_RE.match(field_id):
+            raise ValueError(f"Invalid field id {field_id!r}")
+        return self.root / f"{field_id}.npz"
+
+    @staticmethod
+    def _digest(et0, rain):
+        h = hashlib.blake2b(digest_size=16)
+        h.update(np.ascontiguousarray(et0, dtype=np.float64).tobytes())
+        h.update(np.ascontiguousarray(rain, dtype=np.float64).tobytes())
+        return h.hexdigest()
+
+    @staticmethod
+    def _params_digest(kc, taw, p, initial_depletion, kc_version):
+        h = hashlib.blake2b(digest_size=16)
+        arrays = (taw, p, initial_depletion) if callable(kc) else (kc, taw, p, initial_depletion)
+        for value in arrays:
+            value = np.ascontiguousarray(value, dtype=np.float64)
+            h.update(f"{value.shape}".encode("ascii"))
+            h.update(value.tobytes())
+        if callable(kc):
+            h.update(f"kc:{kc_version!r}".encode("utf-8"))
+        return h.hexdigest()
+
+    def load(self, field_id):
+        try:
+            data = np.load(self._path(field_id), allow_pickle=False)
+        except (OSError, ValueError):
+            return None
+        return {
+            "depletion": data["depletion"],
+            "days": int(data["days"]),
+            "digest": str(data["digest"]),
+            "params": str(data["params"]) if "params" in data.files else None,
+        }
+
+    def save(self, field_id, depletion, days, digest, params):
+        self.root.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, depletion=depletion, days=days, digest=np.array(digest), params=np.array(params))
+        os.replace(tmp, self._path(field_id))
+
+    def reset(self, field_id):
+        self._path(field_id).unlink(missing_ok=True)
+
+    # kc / taw are per-pixel arrays (or scalars); kc may also be a callable
+    # kc(day) when the crop coefficient changes through the season, in which
+    # case kc_version must identify it (e.g. the NDVI scene it came from)
+    def update(self, field_id, daily_ET0, daily_rain, kc, taw, p=0.5, initial_depletion=0.0,
+               kc_version=None):
+        if callable(kc) and kc_version is None:
+            raise ValueError("a callable kc needs a kc_version to detect changes")
+        et0 = np.asarray(daily_ET0, dtype=np.float64)
+        rain = np.asarray(daily_rain, dtype=np.float64)
+        if et0.shape != rain.shape:
+            raise ValueError("daily_ET0 and daily_rain must have the same length")
+        taw = np.asarray(taw, dtype=np.float32)
+        shape = np.broadcast_shapes(np.shape(taw), np.shape(kc) if not callable(kc) else ())
+        params = self._params_digest(kc, taw, p, initial_depletion, kc_version)
+
+        with self._lock:
+            state = self.load(field_id)
+            start = 0
+            # Saved state is only resumed for the same raster shape, crop /
+            # soil inputs and weather prefix; anything else replays from sowing
+            if state is not None and state["depletion"].shape == shape and state["params"] == params:
+                days = state["days"]
+                if days <= len(et0) and self._digest(et0[:days], rain[:days]) == state["digest"]:
+                    start, depletion = days, state["depletion"]
+            if start == 0:
+                depletion = np.full(shape, initial_depletion, dtype=np.float32)
+
+            for day in range(start, len(et0)):
+                day_kc = kc(day) if callable(kc) else kc
+                depletion = step(depletion, et0[day], rain[day], day_kc, taw, p).astype(np.float32)
+
+            if start < len(et0):
+                self.save(field_id, depletion, len(et0), self._digest(et0, rain), params)
+            return depletion
+
+
+def field_id_for_bbox(min_lat, min_lon, max_lat, max_lon, precision=5):
+    coords = ",".join(f"{round(c, precision):.{precision}f}" for c in (min_lat, min_lon, max_lat, max_lon))
+    return hashlib.blake2b(coords.encode("ascii"), digest_size=12).hexdigest()
@@ -0,0 +1,193 @@
+import numpy as np
+from scipy import ndimage
+
+from core import config
+
+_M_PER_DEG = 111_320.0
+
+
+# -----------------------------
+# Value classes (1-D k-means)
+# -----------------------------
+# k-means runs on a histogram of the values, not on the pixels: each
+# iteration costs O(bins) however large the field is.
+def kmeans_classes(values, k=config.ZONE_CLASSES, bins=256, iters=50):
+    values = np.asarray(values, dtype=np.float32)
+    finite = np.isfinite(values)
+    classes = np.full(values.shape, -1, dtype=np.int32)
+    if not finite.any():
+        return classes, np.empty(0, dtype=np.float32)
+
+    lo, hi = float(values[finite].min()), float(values[finite].max())
+    counts, edges = np.histogram(values[finite], bins=bins, range=(lo, hi if hi > lo else lo + 1.0))
+    centers_of_bins = (edges[:-1] + edges[1:]) / 2
+    occupied = counts > 0
+    x, w = centers_of_bins[occupied], counts[occupied].astype(np.float64)
+
+    k = min(k, len(x))
+    centers = np.quantile(x, np.linspace(0, 1, k + 2)[1:-1]) if k > 1 else np.array([np.average(x, weights=w)])
+    for _ in range(iters):
+        assign = np.abs(x[:, None] - centers[None, :]).argmin(axis=1)
+        sums = np.bincount(assign, weights=w * x, minlength=k)
+        totals = np.bincount(assign, weights=w, minlength=k)
+        new = np.where(totals > 0, sums / np.maximum(totals, 1e-12), centers)
+        if np.allclose(new, centers):
+            break
+        centers = new
+
+    centers = np.sort(centers)
+    # Class boundaries are the midpoints between sorted centers
+    classes[finite] = np.searchsorted((centers[:-1] + centers[1:]) / 2, values[finite]).astype(np.int32)
+    return classes, centers.astype(np.float32)
+
+
+# -----------------------------
+# Connected components
+# -----------------------------
+def label_zones(classes, smooth=1, min_pixels=config.ZONE_MIN_PIXELS):
+    # A 3x3 median pass per `smooth` removes speckle before labelling;
+    # classes are ordinal so the median stays a valid class
+    for _ in range(smooth):
+        classes = np.where(classes >= 0, ndimage.median_filter(classes, size=3, mode="nearest"), classes)
+
+    labels, zone_class = _label(classes)
+    if min_pixels > 1 and len(zone_class) > 1:
+        # Zones under min_pixels take the class of the nearest pixel in a
+        # zone that is neither small nor no-data (one distance transform),
+        # then everything is relabelled
+        sizes = np.bincount(labels.ravel(), minlength=len(zone_class))
+        small = (sizes < min_pixels)[labels] & (labels > 0)
+        if small.any() and not small[labels > 0].all():
+            _, (ri, ci) = ndimage.distance_transform_edt(small | (labels == 0), return_indices=True)
+            classes = np.where(small, classes[ri, ci], classes)
+            labels, zone_class = _label(classes)
+    return labels, zone_class
+
+
+def _label(classes):
+    labels = np.zeros(classes.shape, dtype=np.int32)
+    zone_class = [-1]  # index 0 = no data
+    for c in np.unique(classes[classes >= 0]):
+        comp, n = ndimage.label(classes == c)
+        mask = comp > 0
+        labels[mask] = comp[mask] + len(zone_class) - 1
+        zone_class.extend([int(c)] * n)
+    return labels, np.array(zone_class, dtype=np.int32)
+
+
+# -----------------------------
+# Zone outlines
+# -----------------------------
+# Boundary edges between differing labels are found with array shifts; only
+# the chaining of edges into rings walks in Python, so cost follows zone
+# perimeter rather than pixel count. Rings are in (row, col) corner space.
+def zone_rings(labels):
+    padded = np.pad(labels, 1, constant_values=0)
+    inner = padded[1:-1, 1:-1]
+    rows, cols = np.indices(labels.shape)
+
+    # Each pixel edge is oriented clockwise (in image space) around its zone
+    sides = [
+        (padded[:-2, 1:-1], (0, 0), (0, 1)),   # top
+        (padded[1:-1, 2:], (0, 1), (1, 1)),    # right
+        (padded[2:, 1:-1], (1, 1), (1, 0)),    # bottom
+        (padded[1:-1, :-2], (1, 0), (0, 0)),   # left
+    ]
+    edges = {}
+    for neighbour, (sr, sc), (er, ec) in sides:
+        mask = (inner != neighbour) & (inner > 0)
+        for z, r, c in zip(inner[mask].tolist(), rows[mask].tolist(), cols[mask].tolist()):
+            edges.setdefault(z, {}).setdefault((r + sr, c + sc), []).append((r + er, c + ec))
+
+    rings = {}
+    for z, out in edges.items():
+        zone = []
+        while out:
+            start = next(iter(out))
+            ring, vertex = [start], start
+            while True:
+                nexts = out[vertex]
+                nxt = nexts.pop()
+                if not nexts:
+                    del out[vertex]
+                if nxt == start:
+                    break
+                ring.append(nxt)
+                vertex = nxt
+            zone.append(_drop_collinear(ring))
+        rings[z] = zone
+    return rings
+
+
+def _drop_collinear(ring):
+    pts = np.array(ring + ring[:1], dtype=np.int64)
+    d = np.diff(pts, axis=0)
+    turn = np.any(d != np.roll(d, 1, axis=0), axis=1)
+    return [tuple(p) for p in pts[:-1][turn].tolist()]
+
+
+def _signed_area(x, y):
+    return 0.5 * (np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1)))
+
+
+def _ring_area(ring):
+    pts = np.asarray(ring, dtype=np.float64)
+    return abs(_signed_area(pts[:, 1], pts[:, 0]))
+
+
+# RFC 7946: exterior rings counter-clockwise, holes clockwise (in lon/lat)
+def _geojson_ring(coords, exterior):
+    pts = np.asarray(coords, dtype=np.float64)
+    if (_signed_area(pts[:, 0], pts[:, 1]) > 0) != exterior:
+        coords = coords[::-1]
+    return coords + coords[:1]
+
+
+# -----------------------------
+# Zone table
+# -----------------------------
+# values: per-pixel rate raster, row 0 = northern edge of the bbox
+def zone_table(values, min_lat, min_lon, max_lat, max_lon, k=config.ZONE_CLASSES,
+               smooth=1, min_pixels=config.ZONE_MIN_PIXELS, polygons=True):
+    values = np.asarray(values, dtype=np.float32)
+    classes, centers = kmeans_classes(values, k)
+    labels, zone_class = label_zones(classes, smooth, min_pixels)
+
+    n_rows, n_cols = values.shape
+    d_lat = (max_lat - min_lat) / n_rows
+    d_lon = (max_lon - min_lon) / n_cols
+    cos_lat = np.cos(np.radians((min_lat + max_lat) / 2))
+    pixel_ha = (d_lat * _M_PER_DEG) * (d_lon * _M_PER_DEG * cos_lat) / 10_000.0
+
+    flat = labels.ravel()
+    finite = np.isfinite(values).ravel()
+    n_zones = len(zone_class)
+    counts = np.bincount(flat, minlength=n_zones)
+    valid = np.bincount(flat[finite], minlength=n_zones)
+    sums = np.bincount(flat[finite], weights=values.ravel()[finite], minlength=n_zones)
+    means = sums / np.maximum(valid, 1)
+
+    rings = zone_rings(labels) if polygons else {}
+
+    zones = []
+    for z in range(1, n_zones):
+        zone = {
+            "zone_id": z,
+            "class": int(zone_class[z]),
+            "pixels": int(counts[z]),
+            "area_ha": float(counts[z] * pixel_ha),
+            "mean_rate": float(means[z]),
+        }
+        if polygons:
+            # Largest ring is the outline, the rest are holes
+            zone_rings_ = sorted(rings.get(z, []), key=_ring_area, reverse=True)
+            zone["polygon"] = {
+                "type": "Polygon",
+                "coordinates": [
+                    _geojson_ring([[min_lon + c * d_lon, max_lat - r * d_lat] for r, c in ring], i == 0)
+                    for i, ring in enumerate(zone_rings_)
+                ],
+            }
+        zones.append(zone)
+
+    return {"labels": labels, "class_centers": centers, "zones": zones}
@@ -1,14 +1,23 @@
-from fastapi import FastAPI
-from fastapi.responses import HTMLResponse
-from pydantic import BaseModel
-from typing import List, Tuple
+from fastapi import FastAPI, File, Form, Header, HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import HTMLResponse, JSONResponse, Response
+from pydantic import BaseModel, model_validator
+from typing import List, Literal, Optional, Tuple
+from contextlib import asynccontextmanager
 
-import io, base64
+import hashlib, json
 import numpy as np
 import folium
+import matplotlib
+matplotlib.use("Agg")  # headless; figures are rendered from worker threads
 import matplotlib.pyplot as plt
 from branca.colormap import LinearColormap
 
+# Record/replay of upstream HTTP must be in place before the pipelines
+# create their clients (SMART_FARM_HTTP_MODE)
+from core import replay
+replay.install()
+
 # -----------------------------
 # Import your service pipelines
 # -----------------------------
@@ -17,11 +26,93 @@ from services.pest_disease import pest_disease_pipeline
 from services.irrigation import irrigation_pipeline
 from services.nutrient import fertilizer_map
 
+from core import timing
+from core.timing import span, timed
+
+# Whole-pipeline spans; finer stages (fetch, model, risk layers, colorize,
+# PNG encode, ...) are timed inside core/
+predict_weather_pipeline = timed("weather.pipeline")(predict_weather_pipeline)
+pest_disease_pipeline = timed("pests.pipeline")(pest_disease_pipeline)
+irrigation_pipeline = timed("irrigation.pipeline")(irrigation_pipeline)
+fertilizer_map = timed("fertilizer.pipeline")(fertilizer_map)
+
+from core import config, parallel
+from core.arrays import Raster, Series, as_array, check_same_shape, decode_npy, read_upload, same_shape
+from core.cache import TTLCache, weather_fingerprint
+from core.fetch import fetcher
+from core.imagery_cache import imagery_cache
+from core.memo import Memoizer, fingerprint
+from core.model_registry import registry
+from core.raster_store import raster_store
+from core.overlays import LEAFLET_PAGE, content_key, grid_overlay, raster_map
+from core.rendering import close_figure, render_png
+from core.serialization import to_jsonable
+from core.zoning import zone_table
+
 from fastapi import FastAPI
 from fastapi.responses import HTMLResponse
 
+# -----------------------------
+# Lifespan: load models once
+# -----------------------------
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Deserialize + warm the weather LSTM before serving traffic
+    app.state.models = registry.load()
+    # Pooled HTTP client shared by all upstream weather / imagery fetches
+    app.state.fetcher = await fetcher.start(transport=replay.transport())
+    yield
+    await fetcher.aclose()
+    parallel.shutdown()
+    registry.unload()
+
 # Initialize app
-app = FastAPI(title="Smart Farm Dashboard")
+app = FastAPI(title="Smart Farm Dashboard", lifespan=lifespan)
+if timing.ENABLED:
+    app.add_middleware(timing.ServerTimingMiddleware)
+
+# Rendered weather responses, keyed by rounded bbox + day
+weather_cache = TTLCache(maxsize=config.WEATHER_CACHE_SIZE, ttl=config.WEATHER_CACHE_TTL)
+
+# Raw PNG bytes served by /weather/plot/{key}.png, keyed by content hash.
+# Each weather_cache entry also holds its PNG and puts it back here on every
+# hit, so a stub that stays popular never outlives its image.
+plot_store = TTLCache(maxsize=2 * config.WEATHER_CACHE_SIZE, ttl=config.WEATHER_CACHE_TTL)
+
+# irrigation_pipeline is deterministic in its inputs; identical requests
+# cost one hash of the arrays instead of a full run. Only the plain outputs
+# (arrays/scalars) are memoized: folium Maps grow every time they are
+# rendered, so the Map is dropped and render=folium keeps its HTML in a
+# separate entry (see irrigation_folium).
+def irrigation_outputs(**kwargs):
+    result = dict(irrigation_pipeline(**kwargs))
+    result.pop("irrigation_map", None)
+    return result
+
+irrigation_memo = Memoizer(
+    irrigation_outputs,
+    maxsize=config.IRRIGATION_MEMO_SIZE,
+    disk_dir=config.IRRIGATION_MEMO_DIR,
+    disk_max_entries=config.IRRIGATION_MEMO_DISK_ENTRIES,
+)
+
+# Overlay PNGs and layer specs for the shared Leaflet page
+overlay_store = TTLCache(maxsize=config.OVERLAY_STORE_SIZE, ttl=config.OVERLAY_TTL,
+                         maxbytes=config.OVERLAY_STORE_MAX_BYTES)
+
+def cached_response(store, key, media_type, if_none_match, max_age):
+    # Content-addressed keys double as strong ETags
+    headers = {
+        "ETag": f'"{key}"',
+        "Cache-Control": f"public, max-age={max_age}, immutable",
+    }
+    if if_none_match is not None and f'"{key}"' in if_none_match:
+        return Response(status_code=304, headers=headers)
+
+    content = store.get(key)
+    if content is None:
+        raise HTTPException(status_code=404, detail="Resource not found or expired")
+    return Response(content=content, media_type=media_type, headers=headers)
 
 # -----------------------------
 # Request Models
@@ -40,32 +131,50 @@ class PestRequest(BaseModel):
     max_lon: float
 
 class IrrigationRequest(BaseModel):
-    ndvi: list
-    ndwi: list
+    ndvi: Raster
+    ndwi: Raster
     days_after_sowing: int
-    daily_ET0: list
-    daily_rain: list
+    daily_ET0: Series
+    daily_rain: Series
     min_lat: float
     min_lon: float
     max_lat: float
     max_lon: float
 
+    @model_validator(mode="after")
+    def _same_shape(self):
+        return check_same_shape(self, "ndvi", "ndwi")
+
 class FertilizerRequest(BaseModel):
-    ndvi: list
-    ndre: list
-    sm: list
+    ndvi: Raster
+    ndre: Raster
+    sm: Raster
     das: int
     min_lat: float
     min_lon: float
     max_lat: float
     max_lon: float
 
+    @model_validator(mode="after")
+    def _same_shape(self):
+        return check_same_shape(self, "ndvi", "ndre", "sm")
+
 # -----------------------------
 # Endpoint: Weather Predictions
 # -----------------------------
 @app.post("/button1_weather", response_class=HTMLResponse)
-def run_weather(req: WeatherRequest):
-    result = predict_weather_pipeline(
+async def run_weather(req: WeatherRequest):
+    key = weather_fingerprint(req.bbox, req.days_since_sowing, config.WEATHER_CACHE_BBOX_PRECISION)
+    cached = weather_cache.get(key)
+    if cached is not None:
+        html, plot_key, png = cached
+        # Browsers never refetch an immutable image, so refresh it here
+        if plot_store.get(plot_key) is None:
+            plot_store.set(plot_key, png)
+        return html
+
+    result = await run_in_threadpool(
+        predict_weather_pipeline,
         bbox=req.bbox,
         days_since_sowing=req.days_since_sowing
     )
@@ -73,21 +182,53 @@ def run_weather(req: WeatherRequest):
     # Extract matplotlib figure
     fig = result["figure"]  # Must be a Figure object
 
-    buf = io.BytesIO()
-    fig.savefig(buf, format="png")
-    buf.seek(0)
-    img_base64 = base64.b64encode(buf.read()).decode('utf-8')
-    buf.close()
+    png = await run_in_threadpool(render_png, fig)  # also disposes of the figure
 
-    html = f'<h3>Weather Predictions</h3><img src="data:image/png;base64,{img_base64}" />'
+    # Content-addressed: the URL changes whenever the image does
+    plot_key = hashlib.sha1(png).hexdigest()[:20]
+    plot_store.set(plot_key, png)
+
+    html = f'<h3>Weather Predictions</h3><img src="/weather/plot/{plot_key}.png" />'
+    weather_cache.set(key, (html, plot_key, png))
     return html
 
+# -----------------------------
+# Endpoint: Weather Predictions (JSON series)
+# -----------------------------
+# Same forecast as /button1_weather, but the arrays go to the client for
+# rendering and the server never rasterizes the figure.
+@app.post("/button1_weather/json", response_class=JSONResponse)
+async def run_weather_json(req: WeatherRequest):
+    key = ("json",) + weather_fingerprint(req.bbox, req.days_since_sowing, config.WEATHER_CACHE_BBOX_PRECISION)
+    cached = weather_cache.get(key)
+    if cached is not None:
+        return cached
+
+    result = await run_in_threadpool(
+        predict_weather_pipeline,
+        bbox=req.bbox,
+        days_since_sowing=req.days_since_sowing
+    )
+
+    fig = result.pop("figure", None)
+    if fig is not None:
+        close_figure(fig)
+
+    payload = await run_in_threadpool(timed("serialize")(to_jsonable), result)
+    weather_cache.set(key, payload)
+    return payload
+
+@app.get("/weather/plot/{key}.png")
+async def get_weather_plot(key: str, if_none_match: Optional[str] = Header(None)):
+    return cached_response(plot_store, key, "image/png", if_none_match, config.WEATHER_PLOT_MAX_AGE)
+
 # -----------------------------
 # Endpoint: Pest/Disease Risk Maps
 # -----------------------------
 @app.post("/button2_pests", response_class=HTMLResponse)
-def run_pests(req: PestRequest):
-    results = pest_disease_pipeline(
+async def run_pests(req: PestRequest):
+    results = await run_in_threadpool(
+        pest_disease_pipeline,
         weather_data=req.weather_data,
         indices_data=req.indices_data,
         crop_stage=req.crop_stage,
@@ -97,10 +238,14 @@ def run_pests(req: PestRequest):
         max_lon=req.max_lon
     )
 
+    return await run_in_threadpool(pest_maps_html, results)
+
+def pest_maps_html(results):
     # Convert Folium maps to HTML
-    aphid_html = results["aphid_map"]._repr_html_()
-    blast_html = results["blast_map"]._repr_html_()
-    sunn_html = results["sunn_map"]._repr_html_()
+    with span("folium_html"):
+        aphid_html = results["aphid_map"]._repr_html_()
+        blast_html = results["blast_map"]._repr_html_()
+        sunn_html = results["sunn_map"]._repr_html_()
 
     combined_html = f"""
     <h3>Aphid Risk Map</h3>{aphid_html}
@@ -109,35 +254,249 @@ def run_pests(req: PestRequest):
     """
     return combined_html
 
+# -----------------------------
+# Endpoint: Pest/Disease Risk Overlays
+# -----------------------------
+# Compact alternative to /button2_pests: each risk grid (the pipeline's
+# "<layer>_risk" arrays, values in [0, 1]) is served as a PNG overlay and
+# all three are shown on one shared Leaflet page.
+PEST_LAYERS = [
+    ("Aphid Risk", "aphid_risk"),
+    ("Wheat Blast Risk", "blast_risk"),
+    ("Sunn Pest Risk", "sunn_risk"),
+]
+
+@app.post("/button2_pests/overlays", response_class=HTMLResponse)
+async def run_pests_overlays(req: PestRequest):
+    results = await run_in_threadpool(
+        pest_disease_pipeline,
+        weather_data=req.weather_data,
+        indices_data=req.indices_data,
+        crop_stage=req.crop_stage,
+        min_lat=req.min_lat,
+        min_lon=req.min_lon,
+        max_lat=req.max_lat,
+        max_lon=req.max_lon
+    )
+
+    missing = [key for _, key in PEST_LAYERS if results.get(key) is None]
+    if missing:
+        raise HTTPException(status_code=501, detail=f"Pipeline returned no risk grids for: {missing}")
+
+    return await run_in_threadpool(pest_overlays_html, req, results)
+
+def pest_overlays_html(req, results):
+    layers = []
+    for name, key in PEST_LAYERS:
+        png_key, png, layer = grid_overlay(
+            name, results[key], req.min_lat, req.min_lon, req.max_lat, req.max_lon
+        )
+        overlay_store.set(png_key, png)
+        layers.append(layer)
+
+    spec = json.dumps({"layers": layers}).encode("utf-8")
+    spec_key = content_key(spec)
+    overlay_store.set(spec_key, spec)
+
+    return (
+        f'<iframe src="/maps/overlays?spec={spec_key}" '
+        f'width="100%" height="600" style="border:none"></iframe>'
+    )
+
+@app.get("/overlays/{key}.png")
+async def get_overlay_png(key: str, if_none_match: Optional[str] = Header(None)):
+    return cached_response(overlay_store, key, "image/png", if_none_match, config.OVERLAY_MAX_AGE)
+
+@app.get("/overlays/{key}.json")
+async def get_overlay_spec(key: str, if_none_match: Optional[str] = Header(None)):
+    return cached_response(overlay_store, key, "application/json", if_none_match, config.OVERLAY_MAX_AGE)
+
+@app.get("/maps/overlays", response_class=HTMLResponse)
+async def get_overlay_page():
+    return HTMLResponse(LEAFLET_PAGE, headers={"Cache-Control": "public, max-age=86400"})
+
+# -----------------------------
+# Raster map rendering
+# -----------------------------
+# render="folium" returns the pipeline's own map; render="overlay" draws the
+# pipeline's raw grid as a single ImageOverlay so the HTML stays small no
+# matter how many pixels the field has. Declared as a Literal so a bad
+# ?render= is rejected before the pipeline runs.
+RenderMode = Literal["folium", "overlay"]
+
+def render_raster_result(result, map_key, grid_key, name, cmap, render,
+                         min_lat, min_lon, max_lat, max_lon):
+    if render == "folium":
+        with span("folium_html"):
+            return result[map_key]._repr_html_()
+
+    grid = result.get(grid_key)
+    if grid is None:
+        raise HTTPException(status_code=501, detail=f"Pipeline returned no {grid_key}")
+
+    m, key, png = raster_map(name, grid, min_lat, min_lon, max_lat, max_lon, cmap=cmap)
+    overlay_store.set(key, png)
+    with span("folium_html"):
+        return m._repr_html_()
+
+def irrigation_html(result, render, min_lat, min_lon, max_lat, max_lon):
+    return render_raster_result(result, "irrigation_map", "irrigation_grid", "Irrigation (mm)",
+                                "YlGnBu", render, min_lat, min_lon, max_lat, max_lon)
+
+# The pipeline's folium map is only serialized for render=folium. Its HTML is
+# memoized under the inputs' fingerprint; a miss reruns the pipeline for a
+# fresh Map and stores the plain outputs as well.
+def irrigation_folium(**inputs):
+    key = fingerprint(**inputs)
+    html = irrigation_memo.get(f"{key}.folium")
+    if html is None:
+        result = dict(irrigation_pipeline(**inputs))
+        with span("folium_html"):
+            html = result.pop("irrigation_map")._repr_html_()
+        irrigation_memo.set(f"{key}.folium", html)
+        irrigation_memo.set(key, result)
+    return html
+
+def irrigation_response(render, **inputs):
+    if render == "folium":
+        return irrigation_folium(**inputs)
+    result = irrigation_memo(**inputs)
+    return irrigation_html(result, render, inputs["min_lat"], inputs["min_lon"],
+                           inputs["max_lat"], inputs["max_lon"])
+
+def fertilizer_html(result, render, min_lat, min_lon, max_lat, max_lon):
+    return render_raster_result(result, "fertilizer_map", "fertilizer_grid", "Nitrogen (kg/ha)",
+                                "YlOrBr", render, min_lat, min_lon, max_lat, max_lon)
+
+# Zone table for variable-rate equipment; the per-pixel zone labels go to the
+# (size-bounded) raster store and are returned by ID rather than inline
+def zones_response(result, grid_key, k, min_lat, min_lon, max_lat, max_lon):
+    grid = result.get(grid_key)
+    if grid is None:
+        raise HTTPException(status_code=501, detail=f"Pipeline returned no {grid_key}")
+
+    with span("zoning"):
+        zoning = zone_table(grid, min_lat, min_lon, max_lat, max_lon, k=k)
+    return {
+        "labels_raster_id": raster_store.put(zoning["labels"]),
+        "class_centers": to_jsonable(zoning["class_centers"]),
+        "zones": zoning["zones"],
+    }
+
 # -----------------------------
 # Endpoint: Irrigation Map
 # -----------------------------
 @app.post("/button3_irrigation", response_class=HTMLResponse)
-def run_irrigation(req: IrrigationRequest):
-    result = irrigation_pipeline(
-        ndvi=np.array(req.ndvi),
-        ndwi=np.array(req.ndwi),
+async def run_irrigation(req: IrrigationRequest, render: RenderMode = "folium"):
+    return await run_in_threadpool(
+        irrigation_response,
+        render,
+        ndvi=req.ndvi,
+        ndwi=req.ndwi,
+        days_after_sowing=req.days_after_sowing,
+        daily_ET0=req.daily_ET0,
+        daily_rain=req.daily_rain,
+        min_lat=req.min_lat,
+        min_lon=req.min_lon,
+        max_lat=req.max_lat,
+        max_lon=req.max_lon
+    )
+
+@app.post("/button3_irrigation/zones")
+async def run_irrigation_zones(req: IrrigationRequest, k: int = config.ZONE_CLASSES):
+    result = await run_in_threadpool(
+        irrigation_memo,
+        ndvi=req.ndvi,
+        ndwi=req.ndwi,
         days_after_sowing=req.days_after_sowing,
-        daily_ET0=np.array(req.daily_ET0),
-        daily_rain=np.array(req.daily_rain),
+        daily_ET0=req.daily_ET0,
+        daily_rain=req.daily_rain,
         min_lat=req.min_lat,
         min_lon=req.min_lon,
         max_lat=req.max_lat,
         max_lon=req.max_lon
     )
 
-    irrigation_map = result["irrigation_map"]  # Folium map
-    return irrigation_map._repr_html_()
+    return await run_in_threadpool(zones_response, result, "irrigation_grid", k, req.min_lat, req.min_lon, req.max_lat, req.max_lon)
+
+# -----------------------------
+# Binary (.npy multipart) variants
+# -----------------------------
+# Rasters arrive as .npy file parts and are wrapped with np.frombuffer,
+# skipping JSON parsing and per-element validation entirely.
+async def npy_part(upload: UploadFile, name: str, ndim: int = 2):
+    try:
+        # Spooled uploads may sit on disk; read them off the event loop
+        with span("npy_read"):
+            data = await run_in_threadpool(read_upload, upload)
+            return as_array(decode_npy(data), ndim)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=f"{name}: {exc}")
+
+# Same check the JSON request models run in their validators
+def npy_same_shape(**rasters):
+    try:
+        same_shape(**rasters)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+
+@app.post("/button3_irrigation/npy", response_class=HTMLResponse)
+async def run_irrigation_npy(
+    ndvi: UploadFile = File(...),
+    ndwi: UploadFile = File(...),
+    daily_ET0: UploadFile = File(...),
+    daily_rain: UploadFile = File(...),
+    days_after_sowing: int = Form(...),
+    min_lat: float = Form(...),
+    min_lon: float = Form(...),
+    max_lat: float = Form(...),
+    max_lon: float = Form(...),
+    render: RenderMode = "folium",
+):
+    ndvi = await npy_part(ndvi, "ndvi")
+    ndwi = await npy_part(ndwi, "ndwi")
+    npy_same_shape(ndvi=ndvi, ndwi=ndwi)
+
+    return await run_in_threadpool(
+        irrigation_response,
+        render,
+        ndvi=ndvi,
+        ndwi=ndwi,
+        days_after_sowing=days_after_sowing,
+        daily_ET0=await npy_part(daily_ET0, "daily_ET0", ndim=1),
+        daily_rain=await npy_part(daily_rain, "daily_rain", ndim=1),
+        min_lat=min_lat,
+        min_lon=min_lon,
+        max_lat=max_lat,
+        max_lon=max_lon
+    )
 
 # -----------------------------
 # Endpoint: Fertilizer Map
 # -----------------------------
 @app.post("/button4_fertilizer", response_class=HTMLResponse)
-def run_fertilizer(req: FertilizerRequest):
-    result = fertilizer_map(
-        ndvi=np.array(req.ndvi),
-        ndre=np.array(req.ndre),
-        sm=np.array(req.sm),
+async def run_fertilizer(req: FertilizerRequest, render: RenderMode = "folium"):
+    result = await run_in_threadpool(
+        fertilizer_map,
+        ndvi=req.ndvi,
+        ndre=req.ndre,
+        sm=req.sm,
+        das=req.das,
+        min_lat=req.min_lat,
+        min_lon=req.min_lon,
+        max_lat=req.max_lat,
+        max_lon=req.max_lon
+    )
+
+    return await run_in_threadpool(fertilizer_html, result, render, req.min_lat, req.min_lon, req.max_lat, req.max_lon)
+
+@app.post("/button4_fertilizer/zones")
+async def run_fertilizer_zones(req: FertilizerRequest, k: int = config.ZONE_CLASSES):
+    result = await run_in_threadpool(
+        fertilizer_map,
+        ndvi=req.ndvi,
+        ndre=req.ndre,
+        sm=req.sm,
         das=req.das,
         min_lat=req.min_lat,
         min_lon=req.min_lon,
@@ -145,5 +504,78 @@ def run_fertilizer(req: FertilizerRequest):
         max_lon=req.max_lon
     )
 
-    fertilizer_map_interactive = result["fertilizer_map"]  # Folium map
-    return fertilizer_map_interactive._repr_html_()
+    return await run_in_threadpool(zones_response, result, "fertilizer_grid", k, req.min_lat, req.min_lon, req.max_lat, req.max_lon)
+
+@app.post("/button4_fertilizer/npy", response_class=HTMLResponse)
+async def run_fertilizer_npy(
+    ndvi: UploadFile = File(...),
+    ndre: UploadFile = File(...),
+    sm: UploadFile = File(...),
+    das: int = Form(...),
+    min_lat: float = Form(...),
+    min_lon: float = Form(...),
+    max_lat: float = Form(...),
+    max_lon: float = Form(...),
+    render: RenderMode = "folium",
+):
+    ndvi = await npy_part(ndvi, "ndvi")
+    ndre = await npy_part(ndre, "ndre")
+    sm = await npy_part(sm, "sm")
+    npy_same_shape(ndvi=ndvi, ndre=ndre, sm=sm)
+
+    result = await run_in_threadpool(
+        fertilizer_map,
+        ndvi=ndvi,
+        ndre=ndre,
+        sm=sm,
+        das=das,
+        min_lat=min_lat,
+        min_lon=min_lon,
+        max_lat=max_lat,
+        max_lon=max_lon
+    )
+
+    return await run_in_threadpool(fertilizer_html, result, render, min_lat, min_lon, max_lat, max_lon)
+
+# -----------------------------
+# Raster store
+# -----------------------------
+# Upload a raster once (.npy), then pass the returned ID in place of the
+# inline array in IrrigationRequest / FertilizerRequest.
+@app.post("/rasters")
+async def upload_raster(raster: UploadFile = File(...)):
+    array = await npy_part(raster, "raster", ndim=None)
+    raster_id = await run_in_threadpool(raster_store.put, array)
+    return {"id": raster_id, "shape": list(array.shape), "dtype": array.dtype.str}
+
+@app.get("/rasters/{raster_id}")
+async def get_raster_info(raster_id: str):
+    try:
+        array = raster_store.get(raster_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Unknown raster id")
+    return {"id": raster_id, "shape": list(array.shape), "dtype": array.dtype.str}
+
+# -----------------------------
+# Metrics
+# -----------------------------
+# Prometheus text format: per-stage latency histograms plus cache counters
+@app.get("/metrics")
+async def get_metrics():
+    caches = {
+        "weather": weather_cache.stats(),
+        "weather_plot": plot_store.stats(),
+        "overlay": overlay_store.stats(),
+        "imagery": imagery_cache.stats(),
+    }
+    memo = irrigation_memo.stats()
+    body = "\n".join([
+        timing.stage_seconds.exposition(),
+        timing.metric("smart_farm_cache_hits_total", "counter", "Cache hits.", "cache",
+                      {name: stats["hits"] for name, stats in caches.items()}),
+        timing.metric("smart_farm_cache_misses_total", "counter", "Cache misses.", "cache",
+                      {name: stats["misses"] for name, stats in caches.items()}),
+        timing.metric("smart_farm_irrigation_memo_total", "counter", "Irrigation memo lookups by outcome.", "outcome",
+                      {"memory_hit": memo["memory_hits"], "disk_hit": memo["disk_hits"], "miss": memo["misses"]}),
+    ])
+    return Response(content=body + "\n", media_type="text/plain; version=0.0.4")
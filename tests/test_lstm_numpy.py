@@ -0,0 +1,92 @@
+import importlib.util
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from core import config
+from core.lstm_numpy import (
+    NumpyLSTMModel, _layer_from_config, check_parity, forecast_cells, load_scaler_from_npz,
+)
+
+HAS_TENSORFLOW = importlib.util.find_spec("tensorflow") is not None
+HAS_H5PY = importlib.util.find_spec("h5py") is not None
+
+
+# -----------------------------
+# NumPy backend vs Keras
+# -----------------------------
+@unittest.skipUnless(HAS_H5PY and config.WEATHER_MODEL_PATH.exists(), "needs h5py and the weather model")
+class NumpyBackendTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.model = NumpyLSTMModel.from_h5(config.WEATHER_MODEL_PATH)
+
+    @unittest.skipUnless(HAS_TENSORFLOW, "needs tensorflow")
+    def test_parity_with_keras(self):
+        self.assertLess(check_parity(self.model, n_samples=64), 1e-4)
+
+    @unittest.skipUnless(HAS_TENSORFLOW, "needs tensorflow")
+    def test_npz_round_trip_parity_with_keras(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "weather_lstm.npz"
+            self.model.save_npz(path)
+            self.assertLess(check_parity(NumpyLSTMModel.from_npz(path), n_samples=64), 1e-4)
+
+    def test_npz_round_trip_is_exact(self):
+        x = np.random.default_rng(1).random((8,) + tuple(self.model.input_shape[1:]), dtype=np.float32)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "weather_lstm.npz"
+            self.model.save_npz(path)
+            np.testing.assert_array_equal(NumpyLSTMModel.from_npz(path).predict(x), self.model.predict(x))
+
+    @unittest.skipUnless(config.WEATHER_SCALER_PATH.exists(), "needs the weather scaler")
+    def test_scaler_matches_sklearn(self):
+        import joblib
+
+        scaler = joblib.load(config.WEATHER_SCALER_PATH)
+        x = np.random.default_rng(2).random((32, scaler.n_features_in_)) * 40
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "weather_lstm.npz"
+            self.model.save_npz(path, scaler=scaler)
+            params = load_scaler_from_npz(path)
+        np.testing.assert_allclose(params.transform(x), scaler.transform(x), rtol=1e-6, atol=1e-6)
+        np.testing.assert_allclose(params.inverse_transform(x), scaler.inverse_transform(x), rtol=1e-6, atol=1e-6)
+
+
+# -----------------------------
+# Grid forecasts
+# -----------------------------
+class ForecastCellsTest(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        features, units = 4, 3
+        weights = [rng.standard_normal((features, 4 * units), dtype=np.float32),
+                   rng.standard_normal((units, 4 * units), dtype=np.float32),
+                   np.zeros(4 * units, dtype=np.float32)]
+        cfg = {"name": "lstm", "units": units, "activation": "tanh", "recurrent_activation": "sigmoid"}
+        self.model = NumpyLSTMModel([_layer_from_config("LSTM", cfg, weights)], (None, 5, features))
+        self.cells = rng.random((7, 5, features), dtype=np.float32)
+
+    def test_chunking_does_not_change_result(self):
+        full = self.model.predict(self.cells)
+        self.assertEqual(full.shape, (7, 3))
+        out = forecast_cells(self.model, IdentityScaler(), self.cells, chunk_size=2)
+        np.testing.assert_allclose(out, full, rtol=1e-6)
+
+    def test_no_cells_has_output_width(self):
+        out = forecast_cells(self.model, IdentityScaler(), self.cells[:0])
+        self.assertEqual(out.shape, (0, 3))
+
+
+class IdentityScaler:
+    def transform(self, x):
+        return x
+
+    def inverse_transform(self, x):
+        return x
+
+
+if __name__ == "__main__":
+    unittest.main()
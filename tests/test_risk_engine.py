@@ -0,0 +1,97 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from core.risk_engine import RiskContext, RiskEngine
+
+
+def sample_engine():
+    # Three layers shaped like the pest/disease surfaces, sharing the same
+    # rolling temperature window and vegetation mask
+    engine = RiskEngine()
+
+    @engine.layer("aphid_risk")
+    def aphid(ctx):
+        warm = ctx.rolling_mean("temperature", 7)[-1]
+        return ctx.index_mask("ndvi", 0.3) * np.clip((warm - 10.0) / 15.0, 0.0, 1.0)
+
+    @engine.layer("blast_risk")
+    def blast(ctx):
+        wet_days = ctx.count_within("humidity", 85.0, 100.0, last=7)
+        warm = ctx.rolling_mean("temperature", 7)[-1]
+        return ctx.index_mask("ndvi", 0.3) * (wet_days / 7.0) * (warm > 18.0)
+
+    @engine.layer("sunn_risk")
+    def sunn(ctx):
+        return 0.2 * ctx.crop_stage * ctx.indices["ndvi"]
+
+    return engine
+
+
+def sample_inputs(shape=(6, 8), days=30, seed=0):
+    rng = np.random.default_rng(seed)
+    weather = {
+        "temperature": rng.uniform(5, 30, days).tolist(),
+        "humidity": rng.uniform(40, 100, days).tolist(),
+    }
+    indices = {"ndvi": rng.uniform(0, 1, shape).tolist()}
+    return weather, indices
+
+
+# -----------------------------
+# Fused evaluation
+# -----------------------------
+class RiskEngineTest(unittest.TestCase):
+    def test_produces_every_layer(self):
+        weather, indices = sample_inputs()
+        risks = sample_engine().compute(weather, indices, crop_stage=3)
+
+        self.assertEqual(list(risks), ["aphid_risk", "blast_risk", "sunn_risk"])
+        for name, grid in risks.items():
+            self.assertEqual(grid.shape, (6, 8), name)
+            self.assertEqual(grid.dtype, np.float32, name)
+            self.assertTrue(((grid >= 0) & (grid <= 1)).all(), name)
+
+    def test_matches_direct_computation(self):
+        weather, indices = sample_inputs()
+        risks = sample_engine().compute(weather, indices, crop_stage=3)
+
+        ndvi = np.asarray(indices["ndvi"], dtype=np.float32)
+        temperature = np.asarray(weather["temperature"], dtype=np.float32)
+        humidity = np.asarray(weather["humidity"], dtype=np.float32)
+        warm = temperature[-7:].mean()
+        wet_days = np.count_nonzero((humidity[-7:] >= 85) & (humidity[-7:] <= 100))
+
+        np.testing.assert_allclose(risks["aphid_risk"], (ndvi >= 0.3) * np.clip((warm - 10) / 15, 0, 1), rtol=1e-5)
+        np.testing.assert_allclose(risks["blast_risk"], (ndvi >= 0.3) * (wet_days / 7) * (warm > 18), rtol=1e-5)
+        np.testing.assert_allclose(risks["sunn_risk"], np.clip(0.6 * ndvi, 0, 1), rtol=1e-5)
+
+    def test_shared_intermediates_computed_once(self):
+        weather, indices = sample_inputs()
+        calls = []
+        original = RiskContext.shared
+
+        def counting_shared(ctx, name, fn):
+            def wrapped(c):
+                calls.append(name)
+                return fn(c)
+            return original(ctx, name, wrapped)
+
+        with mock.patch.object(RiskContext, "shared", counting_shared):
+            sample_engine().compute(weather, indices, crop_stage=3)
+
+        self.assertEqual(calls.count(("rolling_mean", "temperature", 7)), 1)
+        self.assertEqual(calls.count(("index_mask", "ndvi", 0.3, np.inf)), 1)
+        self.assertEqual(len(calls), len(set(calls)))
+
+    def test_count_within_last(self):
+        ctx = RiskContext({"humidity": [90, 95, 50, 99]}, {"ndvi": [[0.5]]}, crop_stage=1)
+        self.assertEqual(ctx.count_within("humidity", 85, 100, last=0), 0)
+        self.assertEqual(ctx.count_within("humidity", 85, 100, last=2), 1)
+        self.assertEqual(ctx.count_within("humidity", 85, 100, last=10), 3)
+        self.assertEqual(ctx.count_within("humidity", 85, 100), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import tempfile
+import unittest
+
+import numpy as np
+
+from core.water_balance import WaterBalanceTracker, step
+
+FIELD = "field-1"
+
+
+def replay(et0, rain, kc, taw, p=0.5, initial_depletion=0.0):
+    depletion = np.full(np.broadcast_shapes(np.shape(kc), np.shape(taw)), initial_depletion, dtype=np.float32)
+    for day in range(len(et0)):
+        depletion = step(depletion, et0[day], rain[day], kc, taw, p).astype(np.float32)
+    return depletion
+
+
+# -----------------------------
+# Incremental updates vs full replay
+# -----------------------------
+class WaterBalanceTrackerTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tracker = WaterBalanceTracker(self._tmp.name)
+        rng = np.random.default_rng(0)
+        self.et0 = rng.uniform(2, 7, 120)
+        self.rain = np.where(rng.random(120) < 0.2, rng.uniform(0, 20, 120), 0.0)
+        self.kc = np.full((4, 5), 0.8, dtype=np.float32)
+        self.taw = np.linspace(60, 140, 20, dtype=np.float32).reshape(4, 5)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_incremental_matches_replay(self):
+        for days in (30, 31, 90, 120):
+            out = self.tracker.update(FIELD, self.et0[:days], self.rain[:days], self.kc, self.taw)
+            np.testing.assert_allclose(out, replay(self.et0[:days], self.rain[:days], self.kc, self.taw), rtol=1e-5)
+
+    def test_resumes_from_saved_state(self):
+        self.tracker.update(FIELD, self.et0[:100], self.rain[:100], self.kc, self.taw)
+        self.assertEqual(self.tracker.load(FIELD)["days"], 100)
+        self.tracker.update(FIELD, self.et0[:101], self.rain[:101], self.kc, self.taw)
+        self.assertEqual(self.tracker.load(FIELD)["days"], 101)
+
+    def test_edited_history_replays(self):
+        self.tracker.update(FIELD, self.et0[:60], self.rain[:60], self.kc, self.taw)
+        rain = self.rain[:61].copy()
+        rain[10] += 15.0
+        out = self.tracker.update(FIELD, self.et0[:61], rain, self.kc, self.taw)
+        np.testing.assert_allclose(out, replay(self.et0[:61], rain, self.kc, self.taw), rtol=1e-5)
+
+    def test_changed_kc_replays(self):
+        et0, rain = np.full(100, 5.0), np.zeros(100)
+        self.tracker.update(FIELD, et0[:99], rain[:99], 0.3, 100.0)
+        out = self.tracker.update(FIELD, et0, rain, 1.2, 100.0)
+        np.testing.assert_allclose(out, replay(et0, rain, 1.2, 100.0), rtol=1e-5)
+
+    def test_changed_soil_parameters_replay(self):
+        self.tracker.update(FIELD, self.et0[:60], self.rain[:60], self.kc, self.taw)
+        for kwargs in ({"taw": self.taw * 1.5}, {"p": 0.3}, {"initial_depletion": 20.0}):
+            args = {"kc": self.kc, "taw": self.taw, **kwargs}
+            out = self.tracker.update(FIELD, self.et0[:61], self.rain[:61], **args)
+            np.testing.assert_allclose(out, replay(self.et0[:61], self.rain[:61], **args), rtol=1e-5)
+
+    def test_changed_shape_replays(self):
+        self.tracker.update(FIELD, self.et0[:30], self.rain[:30], np.full((3, 3), 0.8), 100.0)
+        out = self.tracker.update(FIELD, self.et0[:31], self.rain[:31], np.full((5, 5), 0.8), 100.0)
+        self.assertEqual(out.shape, (5, 5))
+
+    def test_callable_kc_needs_version(self):
+        with self.assertRaises(ValueError):
+            self.tracker.update(FIELD, self.et0, self.rain, lambda day: 0.8, self.taw)
+
+    def test_callable_kc_version_change_replays(self):
+        self.tracker.update(FIELD, self.et0[:60], self.rain[:60], lambda day: 0.3, self.taw, kc_version="a")
+        out = self.tracker.update(FIELD, self.et0[:61], self.rain[:61], lambda day: 1.1, self.taw, kc_version="b")
+        np.testing.assert_allclose(out, replay(self.et0[:61], self.rain[:61], 1.1, self.taw), rtol=1e-5)
+
+
+if __name__ == "__main__":
+    unittest.main()